@@ -4,7 +4,7 @@ import traceback
 from typing import Callable
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -13,6 +13,9 @@ from src.config.settings import settings
 from src.api.routes import rag
 from src.api.models import ErrorResponse
 import secrets
+from contextlib import asynccontextmanager
+from src.services.retrieval_service import close_query_embedder
+from src.services.crawler_service import close_crawlers
 
 # Configure logging
 logging.basicConfig(
@@ -21,6 +24,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop the query embedder's background worker shared by all requests
+    await close_query_embedder()
+    # Close crawler connection pools, e.g. the module-level crawler in the v1 endpoints
+    await close_crawlers()
+
+
 app = FastAPI(
     title="RAG Agent API",
     description="""
@@ -51,7 +64,9 @@ app = FastAPI(
     """,
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add middleware for logging and monitoring
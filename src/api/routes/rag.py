@@ -11,6 +11,9 @@ from src.services.validation_helper import validate_query_format
 
 router = APIRouter(prefix="/rag", tags=["RAG Agent"])
 
+# Seconds the RAG agent gets to answer before the query returns a timeout error
+QUERY_TIMEOUT_SECONDS = 30
+
 
 class QueryValidationResponse(BaseModel):
     """
@@ -70,7 +73,7 @@ async def query_rag_agent(request: QueryRequest):
                     selected_text=request.selected_text,
                     user_context=request.user_context
                 ),
-                timeout=30  # Default timeout of 30 seconds
+                timeout=QUERY_TIMEOUT_SECONDS
             )
         except asyncio.TimeoutError:
             processing_time = time.time() - start_time
@@ -5,14 +5,14 @@ from src.models.content_chunk import CrawlJob, CrawlJobCreate, QueryRequest
 from src.services.crawler_service import CrawlerService
 from src.services.chunking_service import ChunkingService
 from src.services.embedding_service import CohereClient
-from src.services.storage_service import QdrantService
+from src.services.storage_service import get_qdrant_service
 from src.config.settings import settings
 
 router = APIRouter()
 crawler_service = CrawlerService()
 chunking_service = ChunkingService()
 embedding_service = CohereClient()
-storage_service = QdrantService()
+storage_service = get_qdrant_service()
 
 
 @router.post("/crawl", response_model=CrawlJob)
@@ -93,7 +93,7 @@ async def generate_embeddings(contents: List[str]):
     Generate embeddings for provided content chunks
     """
     try:
-        embeddings = embedding_service.generate_embeddings(contents)
+        embeddings = await embedding_service.generate_embeddings_async(contents)
         return {"embeddings_generated": len(embeddings), "embeddings": embeddings}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -122,7 +122,7 @@ async def store_vectors_in_qdrant(chunks_with_embeddings: List[dict]):
             )
             content_chunks.append(content_chunk)
 
-        success = storage_service.store_chunks(content_chunks)
+        success = await storage_service.async_store_chunks(content_chunks)
         if success:
             return {"stored_chunks": len(content_chunks), "status": "success"}
         else:
@@ -249,7 +249,10 @@ async def execute_rag_pipeline(urls: List[str]):
         from src.services.pipeline_service import PipelineService
 
         pipeline_service = PipelineService()
-        result = await pipeline_service.execute_pipeline(urls)
+        try:
+            result = await pipeline_service.execute_pipeline(urls)
+        finally:
+            await pipeline_service.aclose()
 
         return result
     except Exception as e:
@@ -9,7 +9,7 @@ from datetime import datetime
 
 from ..chat.models import UserQuery, AIResponse, RetrievedContext, ChatSession
 from ..chat.services import ChatService
-from ..rag.services import RAGService
+from ..rag.services import RAGService, get_rag_service
 from ..core.config import settings
 from ..chat.services import get_chat_service
 from ..services.session_service import SessionService, get_session_service
@@ -21,7 +21,7 @@ router = APIRouter(prefix="/chat", tags=["chat"])
 async def create_chat_completion(
     request: dict,  # Using dict to match OpenAI's format
     chat_service: ChatService = Depends(get_chat_service),
-    rag_service: RAGService = Depends(),
+    rag_service: RAGService = Depends(get_rag_service),
     session_service: SessionService = Depends(get_session_service)
 ):
     """
@@ -113,7 +113,7 @@ async def create_chat_completion(
 @router.post("/validate", response_model=dict)
 async def validate_query(
     request: dict,
-    rag_service: RAGService = Depends()
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Check if a query can be answered using the available textbook content.
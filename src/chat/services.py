@@ -6,9 +6,11 @@ from typing import List
 import uuid
 from datetime import datetime
 
+from fastapi import Depends
+
 from ..chat.models import UserQuery, AIResponse, RetrievedContext
 from ..rag.services import RAGService
-from ..services.session_service import SessionService
+from ..services.session_service import SessionService, get_session_service
 
 
 class ChatService:
@@ -78,7 +80,9 @@ class ChatService:
         return ai_response
 
 
-# Dependency for FastAPI
-async def get_chat_service() -> ChatService:
-    session_service = SessionService()
-    return ChatService(session_service)
\ No newline at end of file
+# Dependency for FastAPI; chat turns are recorded in the shared session store
+# (Redis when configured), the same one the endpoints create sessions in
+async def get_chat_service(
+    session_service: SessionService = Depends(get_session_service)
+) -> ChatService:
+    return ChatService(session_service)
@@ -1,7 +1,7 @@
 import typer
 import asyncio
 from typing import Optional
-from src.services.retrieval_service import RetrievalService
+from src.services.retrieval_service import RetrievalService, close_query_embedder
 from src.services.pipeline_service import PipelineService
 from src.utils.validation import deterministic_validation
 from src.utils.validation_dataset import get_all_test_queries, get_test_case_by_query
@@ -9,6 +9,17 @@ from src.utils.validation_dataset import get_all_test_queries, get_test_case_by_
 app = typer.Typer()
 
 
+async def _run_and_close(command):
+    """
+    Run a command's coroutine, then stop the shared query embedder before
+    asyncio.run closes the loop
+    """
+    try:
+        return await command
+    finally:
+        await close_query_embedder()
+
+
 @app.command()
 def query(
     query_text: str = typer.Argument(..., help="The query text to search for relevant content"),
@@ -39,7 +50,7 @@ def query(
             typer.echo(f"   Chapter: {chunk.get('chapter', 'N/A')}")
             typer.echo("-" * 50)
 
-    asyncio.run(run_query())
+    asyncio.run(_run_and_close(run_query()))
 
 
 @app.command()
@@ -69,7 +80,7 @@ def validate_pipeline():
             else:
                 typer.echo("  ✗ No results found")
 
-    asyncio.run(run_validation())
+    asyncio.run(_run_and_close(run_validation()))
     typer.echo("\nPipeline validation completed.")
 
 
@@ -140,7 +151,7 @@ def test_validation(
 
         return all_valid, avg_confidence
 
-    is_valid, avg_conf = asyncio.run(run_comprehensive_validation())
+    is_valid, avg_conf = asyncio.run(_run_and_close(run_comprehensive_validation()))
 
     if is_valid:
         typer.echo("\n🎉 All validation tests passed!")
@@ -10,11 +10,25 @@ class Settings(BaseSettings):
     # Cohere settings
     cohere_api_key: str
     cohere_model: str = "embed-multilingual-v2.0"
+    embedding_concurrency: int = 8  # Max concurrent embed requests to Cohere
+    embedding_max_batch_chars: Optional[int] = None  # Per-request character budget (e.g. 2048 on Bedrock)
 
     # Qdrant settings
     qdrant_url: str
     qdrant_api_key: Optional[str] = None
     qdrant_collection_name: str = "textbook_chunks"
+    qdrant_prefer_grpc: bool = True  # Use gRPC instead of REST for data operations
+    qdrant_grpc_port: int = 6334
+    qdrant_timeout: int = 60  # Request timeout in seconds
+    qdrant_batch_size: int = 256  # Points per upsert request when bulk loading
+    qdrant_upload_concurrency: int = 4  # Max concurrent upsert requests
+    qdrant_indexing_threshold: int = 20000  # Restored after a bulk load pauses HNSW indexing
+    qdrant_seen_ids_cache_size: int = 100000  # Stored point ids remembered to skip existence checks
+    qdrant_search_oversampling: float = 2.0  # Quantized candidates fetched per result before rescoring
+    qdrant_search_cache_size: int = 10000  # Search results cached by query vector
+    qdrant_search_cache_ttl: float = 30.0  # Seconds a cached search result stays valid
+    qdrant_max_connections: int = 100  # HTTP connection pool size per client
+    qdrant_max_keepalive_connections: int = 50  # Idle pooled connections kept open
 
     # Book URLs to crawl
     book_urls: List[str] = []
@@ -25,12 +39,14 @@ class Settings(BaseSettings):
 
     # Crawler settings
     crawl_delay: float = 1.0  # Delay between requests in seconds
+    crawl_concurrency: int = 20  # Max pages fetched at once by the pipeline
     max_retries: int = 3
     timeout: int = 30
 
     # Retrieval settings
     default_top_k: int = 5
     default_score_threshold: Optional[float] = None
+    query_embedding_cache_size: int = 10000  # Max query embeddings kept in memory
 
     # API settings
     api_v1_prefix: str = "/api/v1"
@@ -40,6 +40,9 @@ class Settings(BaseSettings):
     # Database Settings
     DATABASE_URL: str
 
+    # Session Settings (sessions are kept in memory when unset)
+    REDIS_URL: Optional[str] = None
+
     # Application Settings
     MIN_SIMILARITY_SCORE: float = DEFAULT_MIN_SIMILARITY_SCORE
     SEARCH_LIMIT: int = DEFAULT_SEARCH_LIMIT
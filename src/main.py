@@ -5,6 +5,7 @@ Based on the implementation plan in plan.md.
 import logging
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .chat.endpoints import router as chat_router
 from .chat.services import get_chat_service
@@ -20,7 +21,8 @@ setup_logging()
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    description="API for integrating OpenAI ChatKit with the RAG system for the Physical AI & Humanoid Robotics textbook"
+    description="API for integrating OpenAI ChatKit with the RAG system for the Physical AI & Humanoid Robotics textbook",
+    default_response_class=ORJSONResponse
 )
 
 # Add rate limiting middleware first (so it's executed first)
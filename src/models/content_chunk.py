@@ -1,3 +1,4 @@
+from functools import cached_property
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime
@@ -26,6 +27,11 @@ class ContentChunk(ContentChunkBase):
     created_at: datetime
     updated_at: datetime
 
+    @cached_property
+    def created_at_iso(self) -> str:
+        """ISO-8601 creation timestamp, formatted once per chunk"""
+        return self.created_at.isoformat()
+
 
 class QueryResult(BaseModel):
     """Model for query results"""
@@ -2,12 +2,14 @@
 RAG (Retrieval Augmented Generation) business logic services.
 Based on the data-model.md specification and user stories.
 """
+from functools import lru_cache
 from typing import List, Tuple
 import uuid
 from datetime import datetime
 
 from ..chat.models import UserQuery, RetrievedContext, AIResponse
 from ..core.config import settings
+from .utils import get_word_set
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 import cohere
@@ -15,6 +17,21 @@ import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
 
+# Strict grounding instructions; static, so the prompt prefix is built once
+_SYSTEM_INSTRUCTIONS = """You are an AI assistant for the Physical AI & Humanoid Robotics textbook.
+
+CRITICAL RULES:
+1. You MUST answer ONLY using information from the provided textbook documents below
+2. Do NOT use your general knowledge or training data
+3. Do NOT make up, infer, or hallucinate any information
+4. If the documents don't contain enough information to answer the question, say: "I don't have enough information from the textbook to answer this question completely."
+5. Always cite which document(s) you're referencing in your answer (e.g., "According to Document 1...")
+6. Stay strictly within the scope of the provided textbook content"""
+
+_PROMPT_PREFIX = f"{_SYSTEM_INSTRUCTIONS}\n\nTextbook Documents:\n\n"
+_PROMPT_SUFFIX = "\n\nRemember: Answer ONLY based on the information in the documents above. If the answer is not in the documents, say so clearly."
+
+
 class RAGService:
     """
     Service class to handle RAG business logic.
@@ -92,41 +109,26 @@ class RAGService:
         if not retrieved_contexts or len(retrieved_contexts) == 0:
             return "I don't have enough information from the textbook to answer this question. Please try asking about topics covered in the Physical AI & Humanoid Robotics textbook."
 
-        # Prepare the context content with source information
-        context_parts = []
+        # Assemble the prompt around the static instructions in a single join
+        # (tracking the weakest match on the way for the disclaimer below)
+        prompt_parts = [_PROMPT_PREFIX]
+        min_score = 1.0
         for i, ctx in enumerate(retrieved_contexts, 1):
-            source_info = f"[Source: {ctx.source_document}"
+            if ctx.similarity_score < min_score:
+                min_score = ctx.similarity_score
+            if i > 1:
+                prompt_parts.append("\n\n")
+            prompt_parts.append(f"Document {i} [Source: {ctx.source_document}")
             if ctx.section_title:
-                source_info += f", Section: {ctx.section_title}"
+                prompt_parts.append(f", Section: {ctx.section_title}")
             if ctx.page_number:
-                source_info += f", Page: {ctx.page_number}"
-            source_info += "]"
-
-            context_parts.append(f"Document {i} {source_info}:\n{ctx.content}")
-
-        context_content = "\n\n".join(context_parts)
-
-        # Construct a strict prompt to ground the response in textbook content
-        system_instructions = """You are an AI assistant for the Physical AI & Humanoid Robotics textbook.
-
-CRITICAL RULES:
-1. You MUST answer ONLY using information from the provided textbook documents below
-2. Do NOT use your general knowledge or training data
-3. Do NOT make up, infer, or hallucinate any information
-4. If the documents don't contain enough information to answer the question, say: "I don't have enough information from the textbook to answer this question completely."
-5. Always cite which document(s) you're referencing in your answer (e.g., "According to Document 1...")
-6. Stay strictly within the scope of the provided textbook content"""
-
-        # Combine system instructions with context and query
-        full_prompt = f"""{system_instructions}
-
-Textbook Documents:
-
-{context_content}
-
-Question: {query}
-
-Remember: Answer ONLY based on the information in the documents above. If the answer is not in the documents, say so clearly."""
+                prompt_parts.append(f", Page: {ctx.page_number}")
+            prompt_parts.append("]:\n")
+            prompt_parts.append(ctx.content)
+        prompt_parts.append("\n\nQuestion: ")
+        prompt_parts.append(query)
+        prompt_parts.append(_PROMPT_SUFFIX)
+        full_prompt = "".join(prompt_parts)
 
         # Generate response using Gemini API with strict RAG mode
         try:
@@ -153,7 +155,6 @@ Remember: Answer ONLY based on the information in the documents above. If the an
             response_text = response.text
 
             # Add a disclaimer if no strong matches were found
-            min_score = min(ctx.similarity_score for ctx in retrieved_contexts)
             if min_score < 0.7:
                 response_text = f"{response_text}\n\n[Note: The confidence in this answer is moderate as the textbook may not cover this topic in detail.]"
 
@@ -173,16 +174,23 @@ Remember: Answer ONLY based on the information in the documents above. If the an
         if not contexts:
             return False, 0.0, []
 
-        # Calculate average similarity score as confidence
-        avg_similarity = sum(ctx.similarity_score for ctx in contexts) / len(contexts)
+        # Collect the score total, best score and unique sources in one pass
+        total_similarity = 0.0
+        max_similarity = 0.0
+        unique_sources = {}
+        for ctx in contexts:
+            total_similarity += ctx.similarity_score
+            if ctx.similarity_score > max_similarity:
+                max_similarity = ctx.similarity_score
+            unique_sources[ctx.source_document] = None
 
-        # Get unique source documents
-        source_documents = list(set(ctx.source_document for ctx in contexts))
+        # Calculate average similarity score as confidence
+        avg_similarity = total_similarity / len(contexts)
 
         # Consider valid if at least one context has good similarity score
-        is_valid = any(ctx.similarity_score >= settings.MIN_SIMILARITY_SCORE for ctx in contexts)
+        is_valid = max_similarity >= settings.MIN_SIMILARITY_SCORE
 
-        return is_valid, avg_similarity, source_documents
+        return is_valid, avg_similarity, list(unique_sources)
 
     async def verify_response_grounding(
         self,
@@ -198,16 +206,21 @@ Remember: Answer ONLY based on the information in the documents above. If the an
             return False, 0.0
 
         # Calculate how well the response is supported by the contexts
-        response_words = set(response.lower().split())
+        response_words = get_word_set(response)
+        response_word_count = len(response_words)
+        if response_word_count == 0:
+            # No context can overlap with an empty response
+            return False, 0.0
+
         total_context_support = 0.0
         total_weight = 0.0
 
         for ctx in retrieved_contexts:
-            context_words = set(ctx.content.lower().split())
+            context_words = get_word_set(ctx.content)
 
             # Calculate overlap between response and context
-            overlap = len(response_words.intersection(context_words))
-            max_possible_overlap = min(len(response_words), len(context_words))
+            overlap = len(response_words & context_words)
+            max_possible_overlap = min(response_word_count, len(context_words))
 
             if max_possible_overlap > 0:
                 overlap_ratio = overlap / max_possible_overlap
@@ -228,6 +241,8 @@ Remember: Answer ONLY based on the information in the documents above. If the an
         return is_grounded, grounding_score
 
 
-# Dependency for FastAPI
+# Dependency for FastAPI; one service per process, so the Qdrant, Cohere and
+# Gemini clients are built once instead of on every request
+@lru_cache(maxsize=1)
 def get_rag_service():
     return RAGService()
\ No newline at end of file
@@ -3,7 +3,8 @@ Helper functions for the RAG module.
 """
 import asyncio
 import hashlib
-from typing import List
+from functools import lru_cache
+from typing import FrozenSet, List
 from ..chat.models import RetrievedContext
 
 
@@ -14,13 +15,23 @@ def compute_text_hash(text: str) -> str:
     return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
 
+@lru_cache(maxsize=1024)
+def get_word_set(text: str) -> FrozenSet[str]:
+    """
+    Return the set of lowercase whitespace-separated words in text.
+    Cached so contexts reused across grounding and validation checks
+    are only tokenized once.
+    """
+    return frozenset(text.lower().split())
+
+
 def calculate_context_relevance_score(query: str, context: str) -> float:
     """
     Calculate a basic relevance score between a query and context.
     This is a simple implementation - in production, use semantic similarity.
     """
-    query_words = set(query.lower().split())
-    context_words = set(context.lower().split())
+    query_words = get_word_set(query)
+    context_words = get_word_set(context)
     
     if not query_words:
         return 0.0
@@ -41,15 +52,16 @@ def filter_contexts_by_relevance(
 
 def deduplicate_contexts(contexts: List[RetrievedContext]) -> List[RetrievedContext]:
     """
-    Remove duplicate contexts based on content hash.
+    Remove duplicate contexts based on content.
+    The content strings are used as set keys directly; Python caches string
+    hashes, so this avoids computing a SHA-256 digest per context.
     """
-    seen_hashes = set()
+    seen_contents = set()
     unique_contexts = []
     
     for ctx in contexts:
-        content_hash = compute_text_hash(ctx.content)
-        if content_hash not in seen_hashes:
-            seen_hashes.add(content_hash)
+        if ctx.content not in seen_contents:
+            seen_contents.add(ctx.content)
             unique_contexts.append(ctx)
     
     return unique_contexts
\ No newline at end of file
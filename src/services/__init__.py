@@ -1,8 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import Any, Dict
 import asyncio
+import logging
 import time
-from src.utils.logging import setup_logging
 
 
 # Import validation helper
@@ -15,7 +15,7 @@ class BaseService(ABC):
     """
     
     def __init__(self):
-        self.logger = setup_logging()  # Using setup_logging function even though it's for configuration
+        self.logger = logging.getLogger(self.__class__.__name__)
     
     async def retry_with_backoff(self, func, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 60.0):
         """
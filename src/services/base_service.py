@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
 from typing import Any, Dict
 import asyncio
-import time
 import logging
+import random
+
+
+# Shared RNG for retry jitter, seeded once at import
+_rng = random.Random()
 
 
 class BaseService(ABC):
@@ -28,9 +32,8 @@ class BaseService(ABC):
                     break  # Last attempt, exit the loop
                     
                 # Calculate delay with exponential backoff and jitter
-                delay = min(base_delay * (2 ** attempt), max_delay)
-                jitter = delay * 0.1 * (2 * (0.5 - abs(0.5 - (hash(time.time()) % 1000) / 1000)))
-                actual_delay = delay + jitter
+                delay = min(base_delay * (1 << attempt), max_delay)
+                actual_delay = delay * (1 + 0.1 * _rng.random())
                 
                 self.logger.warning(f"Attempt {attempt + 1} failed: {str(e)}. Retrying in {actual_delay:.2f} seconds...")
                 await asyncio.sleep(actual_delay)
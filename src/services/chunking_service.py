@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from src.config.settings import settings
 from src.utils.text_processing import split_text_by_size
 from src.utils.content_processing import clean_text
@@ -18,6 +18,58 @@ class ChunkingService(BaseService):
         self.chunk_size = settings.chunk_size
         self.chunk_overlap = settings.chunk_overlap
     
+    def iter_chunks(
+        self,
+        content: str,
+        url: str,
+        section: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        overlap: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield chunk representations one at a time so callers can start
+        processing (validation, embedding) before the whole document is built
+        """
+        # Use provided values or fall back to settings
+        actual_chunk_size = chunk_size if chunk_size is not None else self.chunk_size
+        actual_overlap = overlap if overlap is not None else self.chunk_overlap
+
+        # Clean and validate content
+        cleaned_content = clean_text(content)
+        if not cleaned_content:
+            self.logger.warning(f"No content to chunk for URL: {url}")
+            return
+
+        # Split content into chunks
+        chunks = split_text_by_size(
+            cleaned_content,
+            actual_chunk_size,
+            actual_overlap
+        )
+
+        # Values shared by every chunk are computed once up front
+        now = datetime.now()
+        base_metadata = {
+            "total_chunks": len(chunks),
+            "original_content_length": len(cleaned_content)
+        }
+
+        # Create chunk representations with metadata
+        for i, chunk_text in enumerate(chunks):
+            yield {
+                "id": str(uuid4()),
+                "content": chunk_text,
+                "source_url": url,
+                "section": section,
+                "metadata": {
+                    "chunk_index": i,
+                    **base_metadata,
+                    "chunk_length": len(chunk_text)
+                },
+                "created_at": now,
+                "updated_at": now
+            }
+
     def chunk_content(
         self, 
         content: str, 
@@ -30,46 +82,11 @@ class ChunkingService(BaseService):
         Chunk content into smaller pieces with configurable size and overlap
         """
         try:
-            # Use provided values or fall back to settings
-            actual_chunk_size = chunk_size if chunk_size is not None else self.chunk_size
-            actual_overlap = overlap if overlap is not None else self.chunk_overlap
-            
-            # Clean and validate content
-            cleaned_content = clean_text(content)
-            if not cleaned_content:
-                self.logger.warning(f"No content to chunk for URL: {url}")
-                return []
-            
-            # Split content into chunks
-            chunks = split_text_by_size(
-                cleaned_content, 
-                actual_chunk_size, 
-                actual_overlap
+            result_chunks = list(
+                self.iter_chunks(content, url, section, chunk_size, overlap)
             )
-            
-            # Create chunk representations with metadata
-            result_chunks = []
-            for i, chunk_text in enumerate(chunks):
-                chunk_id = str(uuid4())
-                
-                chunk_data = {
-                    "id": chunk_id,
-                    "content": chunk_text,
-                    "source_url": url,
-                    "section": section,
-                    "metadata": {
-                        "chunk_index": i,
-                        "total_chunks": len(chunks),
-                        "original_content_length": len(cleaned_content),
-                        "chunk_length": len(chunk_text)
-                    },
-                    "created_at": datetime.now(),
-                    "updated_at": datetime.now()
-                }
-                
-                result_chunks.append(chunk_data)
-            
-            self.logger.info(f"Successfully chunked content from {url} into {len(result_chunks)} chunks")
+            if result_chunks:
+                self.logger.info(f"Successfully chunked content from {url} into {len(result_chunks)} chunks")
             return result_chunks
             
         except Exception as e:
@@ -1,11 +1,13 @@
-import requests
-from typing import List, Dict, Optional, Set
+import re
+import httpx
+from collections import deque
+from typing import ClassVar, List, Dict, Optional, Set
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 import time
 from src.config.settings import settings
 from src.utils.url_validator import is_valid_url, normalize_url, extract_domain
-from src.utils.content_processing import extract_text_from_html, get_content_metadata
+from src.utils.content_processing import HtmlDocument
 from src.models.content_chunk import CrawlJob, CrawlJobCreate
 from src.services.base_service import BaseService
 from src.utils.exceptions import CrawlError
@@ -15,16 +17,42 @@ class CrawlerService(BaseService):
     """
     Service for crawling Docusaurus book pages and extracting content
     """
+
+    # Common patterns for documentation pages, matched case-insensitively:
+    # HTML pages, docs/guide/tutorial/API/reference sections, changelog,
+    # readme, FAQ and example pages
+    _DOC_PATTERN_RE = re.compile(
+        r'\.html|/docs/|/guide/|/tutorial/|/api/|/reference/'
+        r'|/changelog|/readme|/faq|/examples',
+        re.IGNORECASE
+    )
+    # Crawlers with an open connection pool; close_crawlers() closes them on shutdown
+    _open_crawlers: ClassVar[Set["CrawlerService"]] = set()
     
     def __init__(self):
         super().__init__()
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'RAG-Backend-Crawler/1.0'
-        })
+        # Pooled async client, opened on the first fetch so crawlers that never
+        # fetch hold no connections
+        self._client: Optional[httpx.AsyncClient] = None
         self.visited_urls: Set[str] = set()
         self.crawl_jobs: Dict[str, CrawlJob] = {}
         
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        One pooled async client shared by every fetch, so concurrent crawls
+        reuse keep-alive connections instead of opening new ones
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={'User-Agent': 'RAG-Backend-Crawler/1.0'},
+                timeout=settings.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=100)
+            )
+            CrawlerService._open_crawlers.add(self)
+        return self._client
+        
     def _is_valid_docusaurus_url(self, url: str) -> bool:
         """
         Validate if URL is a valid target for crawling
@@ -35,7 +63,7 @@ class CrawlerService(BaseService):
         """
         Extract all valid links from a page, with special handling for Docusaurus sites
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         links = []
 
         # Find all links in the page
@@ -72,22 +100,7 @@ class CrawlerService(BaseService):
         """
         Determine if a path likely leads to documentation content
         """
-        # Common patterns for documentation pages
-        doc_patterns = [
-            '.html',  # HTML pages
-            '/docs/',  # Common documentation path
-            '/guide/',  # Guide pages
-            '/tutorial/',  # Tutorial pages
-            '/api/',  # API documentation
-            '/reference/',  # Reference docs
-            '/changelog',  # Changelog
-            '/readme',  # Readme files
-            '/faq',  # FAQ
-            '/examples',  # Examples
-        ]
-
-        path_lower = path.lower()
-        return any(pattern in path_lower for pattern in doc_patterns) or path.endswith('/')
+        return bool(self._DOC_PATTERN_RE.search(path)) or path.endswith('/')
     
     async def _fetch_page_content(self, url: str) -> Optional[str]:
         """
@@ -95,11 +108,7 @@ class CrawlerService(BaseService):
         """
         async def fetch_attempt():
             try:
-                response = self.session.get(
-                    url,
-                    timeout=settings.timeout,
-                    allow_redirects=True
-                )
+                response = await self.client.get(url)
 
                 # Check if request was successful
                 if response.status_code == 200:
@@ -107,7 +116,7 @@ class CrawlerService(BaseService):
                 else:
                     self.logger.warning(f"Failed to fetch {url}. Status code: {response.status_code}")
                     return None
-            except requests.exceptions.RequestException as e:
+            except httpx.HTTPError as e:
                 self.logger.error(f"Error fetching {url}: {str(e)}")
                 raise e  # Re-raise to trigger retry logic
 
@@ -118,6 +127,15 @@ class CrawlerService(BaseService):
             self.logger.error(f"All retry attempts failed for {url}: {str(e)}")
             return None
     
+    async def aclose(self):
+        """
+        Close the pooled HTTP connections; a later fetch opens a new pool
+        """
+        CrawlerService._open_crawlers.discard(self)
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
     async def crawl_single_page(self, url: str) -> Optional[Dict[str, str]]:
         """
         Crawl a single page and extract content and metadata
@@ -131,14 +149,13 @@ class CrawlerService(BaseService):
         if not content_html:
             return None
 
-        # Extract text and metadata
-        content_text = extract_text_from_html(content_html)
-        metadata = get_content_metadata(content_html, normalized_url)
+        # Extract text and metadata from a single parse of the page
+        document = HtmlDocument(content_html)
 
         return {
             "url": normalized_url,
-            "content": content_text,
-            "metadata": metadata
+            "content": document.text(),
+            "metadata": document.metadata(normalized_url)
         }
     
     async def crawl_site(self, base_url: str, max_pages: Optional[int] = None) -> List[Dict[str, str]]:
@@ -150,11 +167,14 @@ class CrawlerService(BaseService):
 
         base_url = normalize_url(base_url)
         crawled_pages = []
-        urls_to_visit = [base_url]
+        # FIFO frontier plus a companion set for O(1) "already queued" checks
+        urls_to_visit = deque([base_url])
+        pending_urls = {base_url}
         crawled_count = 0
 
         while urls_to_visit and (max_pages is None or crawled_count < max_pages):
-            current_url = urls_to_visit.pop(0)
+            current_url = urls_to_visit.popleft()
+            pending_urls.discard(current_url)
 
             # Skip if already visited
             if current_url in self.visited_urls:
@@ -179,7 +199,8 @@ class CrawlerService(BaseService):
 
                     # Add new links to visit if they haven't been visited
                     for link in new_links:
-                        if link not in self.visited_urls and link not in urls_to_visit:
+                        if link not in self.visited_urls and link not in pending_urls:
+                            pending_urls.add(link)
                             urls_to_visit.append(link)
             else:
                 self.logger.warning(f"Failed to crawl: {current_url}")
@@ -251,4 +272,12 @@ class CrawlerService(BaseService):
         crawl_job.status = "completed" if total_failed == 0 else "failed"
         crawl_job.end_time = datetime.now()
 
-        return crawl_job
\ No newline at end of file
+        return crawl_job
+
+
+async def close_crawlers():
+    """
+    Close the connection pool of every crawler still open in this process
+    """
+    for crawler in list(CrawlerService._open_crawlers):
+        await crawler.aclose()
@@ -1,20 +1,72 @@
 import cohere
-from typing import List, Optional
+import numpy as np
+from typing import List, Optional, Set
 from src.config.settings import settings
 from src.utils.logging import setup_logging
-import time
 import asyncio
+import random
 from src.utils.exceptions import EmbeddingError
 
 
+# Client errors that will fail the same way however often they are retried
+_NON_RETRYABLE_ERRORS = (
+    cohere.errors.BadRequestError,
+    cohere.errors.UnauthorizedError,
+    cohere.errors.ForbiddenError,
+    cohere.errors.NotFoundError,
+    cohere.errors.UnprocessableEntityError,
+)
+
+
+def _get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Read the Retry-After delay (in seconds) from a rate-limit error, if present
+    """
+    headers = getattr(error, "headers", None) or {}
+    retry_after = headers.get("Retry-After") or headers.get("retry-after")
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
 class CohereClient:
     """
     Service class for interacting with Cohere API for embedding generation
     """
 
+    # Cohere rejects embed requests with more than 96 texts
+    batch_size = 96
+
     def __init__(self):
         self.client = cohere.Client(settings.cohere_api_key)
+        self.async_client = cohere.AsyncClient(settings.cohere_api_key)
         self.model = settings.cohere_model
+        self.max_concurrency = settings.embedding_concurrency
+        self.max_batch_chars = settings.embedding_max_batch_chars
+
+    def _pack_batches(self, texts: List[str]) -> List[List[str]]:
+        """
+        Greedily pack texts into request batches, closing a batch when it
+        reaches batch_size texts or would exceed max_batch_chars characters
+        """
+        batches = []
+        current: List[str] = []
+        current_chars = 0
+
+        for text in texts:
+            if current and (
+                len(current) == self.batch_size
+                or (self.max_batch_chars is not None and current_chars + len(text) > self.max_batch_chars)
+            ):
+                batches.append(current)
+                current, current_chars = [], 0
+            current.append(text)
+            current_chars += len(text)
+
+        if current:
+            batches.append(current)
+        return batches
 
     def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
@@ -22,12 +74,9 @@ class CohereClient:
         """
         try:
             # Cohere has limits on batch size, so we may need to process in chunks
-            batch_size = 96  # Conservative batch size under Cohere's limits
             all_embeddings = []
 
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i+batch_size]
-
+            for batch in self._pack_batches(texts):
                 response = self.client.embed(
                     texts=batch,
                     model=self.model,
@@ -37,14 +86,37 @@ class CohereClient:
                 batch_embeddings = [embedding for embedding in response.embeddings]
                 all_embeddings.extend(batch_embeddings)
 
-                # Add a small delay to respect API rate limits
-                time.sleep(0.1)
-
             return all_embeddings
         except Exception as e:
             print(f"Error generating embeddings: {str(e)}")
             raise EmbeddingError(f"Failed to generate embeddings: {str(e)}")
 
+    async def generate_embeddings_async(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for a list of texts, sending the batches to Cohere
+        concurrently (at most max_concurrency requests in flight at once)
+        """
+        try:
+            batches = self._pack_batches(texts)
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def embed_batch(batch: List[str]) -> List[List[float]]:
+                async with semaphore:
+                    response = await self.async_client.embed(
+                        texts=batch,
+                        model=self.model,
+                        input_type="search_document"  # Using search_document for content chunks
+                    )
+                return response.embeddings
+
+            # gather preserves batch order, so embeddings line up with texts
+            batch_results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+
+            return [embedding for batch_embeddings in batch_results for embedding in batch_embeddings]
+        except Exception as e:
+            print(f"Error generating embeddings: {str(e)}")
+            raise EmbeddingError(f"Failed to generate embeddings: {str(e)}") from e
+
     def generate_single_embedding(self, text: str) -> List[float]:
         """
         Generate embedding for a single text
@@ -59,14 +131,22 @@ class CohereClient:
 
         for attempt in range(max_retries + 1):
             try:
-                return self.generate_embeddings(texts)
+                return await self.generate_embeddings_async(texts)
             except Exception as e:
                 last_exception = e
+                cause = e.__cause__ or e
+                if isinstance(cause, _NON_RETRYABLE_ERRORS):
+                    raise  # Permanent client errors won't succeed on retry
                 if attempt == max_retries:
                     break  # Last attempt, exit the loop
 
-                # Calculate delay with exponential backoff
-                delay = min(1.0 * (2 ** attempt), 60.0)
+                # Exponential backoff with full jitter, so concurrent callers
+                # hitting the same rate limit don't retry in lockstep
+                delay = random.uniform(0, min(1.0 * (2 ** attempt), 60.0))
+                if isinstance(cause, cohere.errors.TooManyRequestsError):
+                    retry_after = _get_retry_after(cause)
+                    if retry_after is not None:
+                        delay = min(retry_after, 60.0)
                 print(f"Attempt {attempt + 1} failed: {str(e)}. Retrying in {delay:.2f} seconds...")
                 await asyncio.sleep(delay)
 
@@ -80,18 +160,119 @@ class CohereClient:
         if not embeddings:
             return False
 
-        # Check that all embeddings have the same length
-        first_length = len(embeddings[0])
-        if not all(len(embedding) == first_length for embedding in embeddings):
+        # One C-level conversion checks both the shape and the element types:
+        # ragged input raises, and non-numeric values give a non-numeric dtype
+        try:
+            array = np.asarray(embeddings)
+        except (ValueError, TypeError):
+            return False
+
+        if array.ndim != 2 or array.dtype.kind not in "biuf":
             return False
 
         # Check against expected dimension if provided
-        if expected_dimension is not None and first_length != expected_dimension:
+        if expected_dimension is not None and array.shape[1] != expected_dimension:
             return False
 
-        # Check that embeddings contain only numbers
-        for embedding in embeddings:
-            if not all(isinstance(value, (int, float)) for value in embedding):
-                return False
+        return True
+
+class BatchingEmbedder:
+    """
+    Coalesces concurrent single-text embedding requests into batched Cohere calls.
+    Requests arriving within max_wait seconds of each other share one embed call
+    of up to max_batch_size texts.
+    """
+
+    def __init__(self, client: CohereClient, max_batch_size: int = CohereClient.batch_size, max_wait: float = 0.01):
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Strong references to in-flight flush tasks so they are not collected
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed a single text, sharing the API call with other pending requests
+        """
+        loop = asyncio.get_running_loop()
+        # The queue and worker belong to one event loop; rebuild them if needed
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect_batches())
+
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def aclose(self):
+        """
+        Cancel the background worker and in-flight flushes; callers still
+        waiting on an embedding are cancelled. A later embed() starts afresh
+        """
+        tasks = [task for task in (self._worker, *self._flushes) if task is not None and not task.done()]
+        for task in tasks:
+            task.cancel()
+
+        # Requests queued but not yet collected into a batch
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                future.cancel()
+
+        # Tasks can only be awaited from the loop that runs them
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if tasks and self._loop is running_loop:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+    async def _collect_batches(self):
+        """
+        Drain the queue into batches, flushing on size or when max_wait elapses
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Flush in the background so the next batch can start collecting
+            flush = loop.create_task(self._flush(batch))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            embeddings = await self.client.generate_embeddings_with_retry(texts)
+        except asyncio.CancelledError:
+            # Closed mid-call; don't leave the callers waiting forever
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
 
-        return True
\ No newline at end of file
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
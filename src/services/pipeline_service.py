@@ -1,9 +1,11 @@
-from typing import List, Dict, Any
+import asyncio
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+from src.config.settings import settings
 from src.services.crawler_service import CrawlerService
 from src.services.chunking_service import ChunkingService
 from src.services.embedding_service import CohereClient
-from src.services.storage_service import QdrantService
-from src.models.content_chunk import ContentChunk
+from src.services.storage_service import get_qdrant_service
 from datetime import datetime
 from uuid import uuid4
 
@@ -17,7 +19,13 @@ class PipelineService:
         self.crawler_service = CrawlerService()
         self.chunking_service = ChunkingService()
         self.embedding_service = CohereClient()
-        self.storage_service = QdrantService()
+        self.storage_service = get_qdrant_service()
+    
+    async def aclose(self):
+        """
+        Close the crawler's pooled HTTP connections
+        """
+        await self.crawler_service.aclose()
     
     async def execute_pipeline(self, urls: List[str]) -> Dict[str, Any]:
         """
@@ -33,54 +41,104 @@ class PipelineService:
         }
         
         try:
-            # Step 1: Crawling
-            crawled_data = []
-            for url in urls:
+            # All stages run concurrently, connected by bounded queues:
+            # chunking starts with the first crawled page, embedding starts
+            # with the first full batch of chunks, and storage uploads overlap
+            # with the next embedding round-trip
+            crawl_queue: asyncio.Queue = asyncio.Queue(maxsize=32)
+            embed_queue: asyncio.Queue = asyncio.Queue(maxsize=4)
+
+            # Indexing is paused for the run and rebuilt once at the end
+            async with self.storage_service.async_bulk_ingest():
+                stages = [
+                    asyncio.create_task(self._crawl_stage(urls, crawl_queue, result)),
+                    asyncio.create_task(self._chunk_stage(crawl_queue, embed_queue, result)),
+                    asyncio.create_task(self._embed_stage(embed_queue, result))
+                ]
+                try:
+                    await asyncio.gather(*stages)
+                except Exception:
+                    # Don't leave the other stages blocked on their queues
+                    for stage in stages:
+                        stage.cancel()
+                    raise
+            
+            result["end_time"] = datetime.now()
+            return result
+            
+        except Exception as e:
+            result["end_time"] = datetime.now()
+            result["pipeline_error"] = str(e)
+            return result
+
+    async def _crawl_stage(self, urls: List[str], crawl_queue: asyncio.Queue, result: Dict[str, Any]):
+        """
+        Crawl pages concurrently and hand each one to the chunking stage as it completes
+        """
+        semaphore = asyncio.Semaphore(settings.crawl_concurrency)
+        # Details are filled by index so they stay in URL order
+        details: List[Dict[str, Any]] = [None] * len(urls)
+
+        async def crawl(index: int, url: str):
+            async with semaphore:
                 try:
                     page_data = await self.crawler_service.crawl_single_page(url)
-                    if page_data:
-                        crawled_data.append(page_data)
-                        result["crawling"]["processed"] += 1
-                        result["crawling"]["details"].append({
-                            "url": url,
-                            "status": "success",
-                            "content_length": len(page_data.get("content", ""))
-                        })
-                    else:
-                        result["crawling"]["failed"] += 1
-                        result["crawling"]["details"].append({
-                            "url": url,
-                            "status": "failed"
-                        })
                 except Exception as e:
                     result["crawling"]["failed"] += 1
-                    result["crawling"]["details"].append({
+                    details[index] = {
                         "url": url,
                         "status": "error",
                         "error": str(e)
-                    })
-            
-            # Step 2: Chunking
-            all_chunks = []
-            for page_data in crawled_data:
+                    }
+                    return
+
+            if page_data:
+                result["crawling"]["processed"] += 1
+                details[index] = {
+                    "url": url,
+                    "status": "success",
+                    "content_length": len(page_data.get("content", ""))
+                }
+                await crawl_queue.put(page_data)
+            else:
+                result["crawling"]["failed"] += 1
+                details[index] = {
+                    "url": url,
+                    "status": "failed"
+                }
+
+        try:
+            await asyncio.gather(*(crawl(i, url) for i, url in enumerate(urls)))
+        finally:
+            result["crawling"]["details"].extend(d for d in details if d is not None)
+            await crawl_queue.put(None)  # Signal the chunking stage to finish
+
+    async def _chunk_stage(self, crawl_queue: asyncio.Queue, embed_queue: asyncio.Queue, result: Dict[str, Any]):
+        """
+        Chunk and validate crawled pages, passing full embedding batches downstream
+        """
+        batch: List[Dict[str, Any]] = []
+        try:
+            while (page_data := await crawl_queue.get()) is not None:
                 try:
-                    chunks = self.chunking_service.chunk_content(
+                    chunks = self.chunking_service.iter_chunks(
                         page_data["content"],
                         url=page_data["url"],
                         section=page_data["metadata"].get("title", "")
                     )
-                    
-                    # Validate chunks before proceeding
-                    valid_chunks = []
+
+                    # Validate chunks as they are produced
                     for chunk in chunks:
-                        if self.chunking_service.validate_chunk(chunk):
-                            valid_chunks.append(chunk)
-                        else:
+                        if not self.chunking_service.validate_chunk(chunk):
                             result["chunking"]["failed"] += 1
-                    
-                    all_chunks.extend(valid_chunks)
-                    result["chunking"]["processed"] += len(valid_chunks)
-                    
+                            continue
+
+                        result["chunking"]["processed"] += 1
+                        batch.append(chunk)
+                        if len(batch) >= self.embedding_service.batch_size:
+                            await embed_queue.put(batch)
+                            batch = []
+
                 except Exception as e:
                     result["chunking"]["failed"] += 1
                     result["chunking"]["details"].append({
@@ -88,69 +146,150 @@ class PipelineService:
                         "status": "error",
                         "error": str(e)
                     })
-            
-            # Step 3: Embedding
-            if all_chunks:
-                # Extract content from chunks for embedding
-                contents = [chunk["content"] for chunk in all_chunks]
-                
-                try:
-                    embeddings = await self.embedding_service.generate_embeddings_with_retry(contents)
-                    
-                    # Validate embeddings
-                    valid_embeddings_count = 0
-                    for i, embedding in enumerate(embeddings):
-                        if self.embedding_service.validate_embeddings([embedding]):
-                            all_chunks[i]["embedding"] = embedding
-                            valid_embeddings_count += 1
-                        else:
-                            result["embedding"]["failed"] += 1
-                            all_chunks[i]["embedding"] = []  # Mark as failed
-                    
-                    result["embedding"]["processed"] = valid_embeddings_count
-                    result["embedding"]["failed"] += len(all_chunks) - valid_embeddings_count
-                    
-                except Exception as e:
-                    result["embedding"]["failed"] = len(all_chunks)
-                    result["embedding"]["details"].append({
-                        "status": "error",
-                        "error": str(e)
-                    })
-                    # Mark all chunks as having failed embedding
-                    for chunk in all_chunks:
-                        chunk["embedding"] = []
-            else:
-                result["embedding"]["processed"] = 0
-            
-            # Step 4: Storage
-            chunks_with_embeddings = []
-            for chunk in all_chunks:
-                if chunk.get("embedding") and len(chunk["embedding"]) > 0:
-                    content_chunk = ContentChunk(
-                        id=uuid4(),
-                        content=chunk["content"],
-                        source_url=chunk["source_url"],
-                        section=chunk["section"],
-                        embedding=chunk["embedding"],
-                        created_at=chunk.get("created_at", datetime.now()),
-                        updated_at=chunk.get("updated_at", datetime.now()),
-                        metadata=chunk.get("metadata", {})
-                    )
-                    chunks_with_embeddings.append(content_chunk)
-            
-            if chunks_with_embeddings:
-                storage_success = self.storage_service.store_chunks(chunks_with_embeddings)
-                if storage_success:
-                    result["storage"]["stored"] = len(chunks_with_embeddings)
-                else:
-                    result["storage"]["failed"] = len(chunks_with_embeddings)
-            else:
-                result["storage"]["skipped"] = len([c for c in all_chunks if not c.get("embedding")])
-            
-            result["end_time"] = datetime.now()
-            return result
-            
-        except Exception as e:
-            result["end_time"] = datetime.now()
-            result["pipeline_error"] = str(e)
-            return result
\ No newline at end of file
+
+            if batch:
+                await embed_queue.put(batch)
+        finally:
+            await embed_queue.put(None)  # Signal the embedding stage to finish
+
+    async def _embed_stage(self, embed_queue: asyncio.Queue, result: Dict[str, Any]):
+        """
+        Embed chunk batches concurrently as they arrive and upload them to Qdrant in the background
+        """
+        # Points waiting for upload, kept as parallel arrays: one float32
+        # vector block per embedding batch plus matching ids and payloads
+        pending_ids: List[str] = []
+        pending_vectors: List[np.ndarray] = []
+        pending_payloads: List[Dict[str, Any]] = []
+        store_tasks: List[asyncio.Task] = []
+        # Chunks from one page share a timestamp, so each is formatted once
+        timestamps: Dict[datetime, str] = {}
+        # Up to max_concurrency embed calls are in flight; a batch is only
+        # taken off the queue once a slot is free, so backpressure still
+        # reaches the chunking stage
+        slots = asyncio.Semaphore(self.embedding_service.max_concurrency)
+        embed_tasks: List[asyncio.Task] = []
+
+        def isoformat(value: Optional[datetime]) -> str:
+            if value is None:
+                value = datetime.now()
+            formatted = timestamps.get(value)
+            if formatted is None:
+                formatted = timestamps[value] = value.isoformat()
+            return formatted
+
+        def flush_pending():
+            nonlocal pending_ids, pending_vectors, pending_payloads
+            store_tasks.append(asyncio.create_task(
+                self._store_batch(pending_ids, pending_vectors, pending_payloads, result)
+            ))
+            pending_ids, pending_vectors, pending_payloads = [], [], []
+
+        async def embed_batch(batch: List[Dict[str, Any]]):
+            try:
+                contents = [chunk["content"] for chunk in batch]
+                embeddings = await self.embedding_service.generate_embeddings_with_retry(contents)
+                if len(embeddings) != len(batch):
+                    # Vectors can't be paired with their chunks
+                    raise ValueError(f"Expected {len(batch)} embeddings, got {len(embeddings)}")
+            except Exception as e:
+                result["embedding"]["failed"] += len(batch)
+                result["embedding"]["details"].append({
+                    "status": "error",
+                    "error": str(e)
+                })
+                result["storage"]["skipped"] += len(batch)
+                return
+            finally:
+                slots.release()
+
+            vectors, valid_rows = self._to_vector_block(embeddings)
+            invalid_count = len(batch) - len(valid_rows)
+            result["embedding"]["processed"] += len(valid_rows)
+            result["embedding"]["failed"] += invalid_count
+            result["storage"]["skipped"] += invalid_count
+
+            for row in valid_rows:
+                chunk = batch[row]
+                point_id = str(uuid4())
+                pending_ids.append(point_id)
+                pending_payloads.append({
+                    "content": chunk["content"],
+                    "source_url": chunk["source_url"],
+                    "section": chunk["section"],
+                    "metadata": chunk.get("metadata", {}),
+                    "id": point_id,
+                    "created_at": isoformat(chunk.get("created_at")),
+                    "updated_at": isoformat(chunk.get("updated_at"))
+                })
+            if valid_rows:
+                pending_vectors.append(vectors)
+
+            if len(pending_ids) >= self.storage_service.upsert_batch_size:
+                flush_pending()
+
+        try:
+            while True:
+                await slots.acquire()
+                batch = await embed_queue.get()
+                if batch is None:
+                    slots.release()
+                    break
+                embed_tasks.append(asyncio.create_task(embed_batch(batch)))
+
+            await asyncio.gather(*embed_tasks)
+            if pending_ids:
+                flush_pending()
+            await asyncio.gather(*store_tasks)
+        finally:
+            # Only unfinished tasks are affected, i.e. when the pipeline is cancelled
+            for task in embed_tasks + store_tasks:
+                task.cancel()
+
+    def _to_vector_block(self, embeddings: List[List[float]]) -> Tuple[np.ndarray, List[int]]:
+        """
+        Convert a batch of embeddings into one float32 block holding only
+        the valid rows, returning the block and the indices of those rows
+        """
+        # Common case: a single conversion of the whole well-formed batch;
+        # like validate_embeddings, non-numeric values (e.g. strings) give a
+        # non-numeric dtype instead of being coerced, and NaN/inf rows are
+        # left to the per-row check below
+        try:
+            array = np.asarray(embeddings)
+            if array.ndim == 2 and array.shape[1] > 0 and array.dtype.kind in "biuf":
+                vectors = array.astype(np.float32, copy=False)
+                if np.isfinite(vectors).all():
+                    return vectors, list(range(len(vectors)))
+        except (ValueError, TypeError):
+            pass
+
+        # Malformed response: keep only the finite rows that validate on
+        # their own and match the dimension of the first valid row
+        valid_rows = []
+        dimension = None
+        for row, embedding in enumerate(embeddings):
+            if (
+                self.embedding_service.validate_embeddings([embedding], expected_dimension=dimension)
+                and np.isfinite(np.asarray(embedding, dtype=np.float32)).all()
+            ):
+                valid_rows.append(row)
+                dimension = len(embedding)
+        vectors = np.asarray([embeddings[row] for row in valid_rows], dtype=np.float32)
+        return vectors, valid_rows
+
+    async def _store_batch(
+        self,
+        ids: List[str],
+        vectors: List[np.ndarray],
+        payloads: List[Dict[str, Any]],
+        result: Dict[str, Any]
+    ):
+        """
+        Upload one batch of embedded chunks and record the outcome
+        """
+        stored = await self.storage_service.async_store_batch(ids, np.concatenate(vectors), payloads)
+        if stored:
+            result["storage"]["stored"] += len(ids)
+        else:
+            result["storage"]["failed"] += len(ids)
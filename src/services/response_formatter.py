@@ -1,7 +1,38 @@
 from typing import Dict, Any, List
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
 from src.services.base_service import BaseService
 
 
+class _UsageStatsSchema(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+
+
+class _AgentResponseSchema(BaseModel):
+    """
+    Validation schema for formatted agent responses; the checks run in pydantic's compiled core
+    """
+    model_config = ConfigDict(strict=True)
+
+    answer: str = Field(min_length=1)
+    sources: List[Any]
+    # Strict mode rejects bools, and NaN fails the range check
+    confidence: float = Field(ge=0, le=1)
+    # Optional, but must be a full usage dict when present
+    usage_stats: _UsageStatsSchema = None
+
+    @field_validator("sources", mode="before")
+    @classmethod
+    def _sources_must_be_list(cls, value: Any) -> Any:
+        # Strict list fields still accept tuples; responses carry sources as a list
+        if not isinstance(value, list):
+            raise ValueError("sources must be a list")
+        return value
+
+
 class ResponseFormatterService(BaseService):
     """
     Service for formatting agent responses according to the specified data model
@@ -17,74 +48,25 @@ class ResponseFormatterService(BaseService):
         """
         Format the agent's response according to the AgentResponse data model
         """
-        try:
-            formatted_response = {
-                "answer": answer,
-                "sources": sources,
-                "confidence": confidence
-            }
+        formatted_response = {
+            "answer": answer,
+            "sources": sources,
+            "confidence": confidence
+        }
+        
+        # Add usage stats if provided
+        if usage_stats:
+            formatted_response["usage_stats"] = usage_stats
             
-            # Add usage stats if provided
-            if usage_stats:
-                formatted_response["usage_stats"] = usage_stats
-                
-            return formatted_response
-            
-        except Exception as e:
-            self.logger.error(f"Error formatting agent response: {str(e)}")
-            raise e
+        return formatted_response
 
     def validate_agent_response(self, response: Dict[str, Any]) -> bool:
         """
         Validate that the agent response conforms to the data model
         """
         try:
-            # Check required fields
-            required_fields = ["answer", "sources", "confidence"]
-            for field in required_fields:
-                if field not in response:
-                    self.logger.error(f"Missing required field: {field}")
-                    return False
-            
-            # Validate answer is not empty
-            if not response["answer"] or not isinstance(response["answer"], str):
-                self.logger.error("Answer must be a non-empty string")
-                return False
-            
-            # Validate answer length
-            if len(response["answer"]) == 0:
-                self.logger.error("Answer cannot be empty")
-                return False
-            
-            # Validate sources is a list
-            if not isinstance(response["sources"], list):
-                self.logger.error("Sources must be a list")
-                return False
-            
-            # Validate confidence is between 0 and 1
-            if not isinstance(response["confidence"], float) and not isinstance(response["confidence"], int):
-                self.logger.error("Confidence must be a number")
-                return False
-            
-            if response["confidence"] < 0 or response["confidence"] > 1:
-                self.logger.error("Confidence must be between 0 and 1")
-                return False
-            
-            # If usage stats exist, validate its structure
-            if "usage_stats" in response:
-                usage_stats = response["usage_stats"]
-                if not isinstance(usage_stats, dict):
-                    self.logger.error("Usage stats must be a dictionary")
-                    return False
-                
-                required_usage_fields = ["prompt_tokens", "completion_tokens", "total_tokens"]
-                for field in required_usage_fields:
-                    if field not in usage_stats or not isinstance(usage_stats[field], int):
-                        self.logger.error(f"Usage stats must contain integer field '{field}'")
-                        return False
-            
+            _AgentResponseSchema.model_validate(response)
             return True
-            
-        except Exception as e:
-            self.logger.error(f"Error validating agent response: {str(e)}")
-            return False
\ No newline at end of file
+        except ValidationError as e:
+            self.logger.error(f"Invalid agent response: {e}")
+            return False
@@ -1,8 +1,10 @@
 import time
-from typing import List, Dict, Any, Optional
+import hashlib
+from collections import OrderedDict
+from typing import ClassVar, List, Dict, Any, Optional, Tuple
 from src.services.base_service import BaseService
-from src.services.embedding_service import CohereClient
-from src.services.storage_service import QdrantService
+from src.services.embedding_service import CohereClient, BatchingEmbedder
+from src.services.storage_service import get_qdrant_service
 from src.models.content_chunk import ContentChunk
 from src.config.settings import settings
 from src.utils.validation import validate_embedding_compatibility
@@ -14,10 +16,22 @@ class RetrievalService(BaseService):
     Specifically designed to support the RAG agent with OpenAI integration.
     """
 
+    # LRU cache of query embeddings, keyed by a hash of the query text; shared
+    # across instances since the service is created per request
+    _emb_cache: ClassVar["OrderedDict[bytes, List[float]]"] = OrderedDict()
+    # Query coalescer shared by every instance, created with the first one;
+    # stopped by close_query_embedder() on shutdown
+    _query_embedder: ClassVar[Optional[BatchingEmbedder]] = None
+    # Stored vector size per collection, read from collection metadata on first use
+    _expected_dims: ClassVar[Dict[str, int]] = {}
+
     def __init__(self):
         super().__init__()
         self.embedding_service = CohereClient()
-        self.storage_service = QdrantService()
+        if RetrievalService._query_embedder is None:
+            RetrievalService._query_embedder = BatchingEmbedder(self.embedding_service)
+        self.query_embedder = RetrievalService._query_embedder
+        self.storage_service = get_qdrant_service()
 
     async def retrieve_context(
         self,
@@ -36,52 +50,25 @@ class RetrievalService(BaseService):
 
             # Generate embedding for the query
             embedding_start = time.time()
-            query_embedding = await self.embedding_service.generate_embeddings_with_retry([query])
-            query_vector = query_embedding[0]  # Extract the single embedding
+            query_vector = await self._embed_query(query)
             embedding_time = time.time() - embedding_start
 
             # Verify embedding compatibility with stored vectors
-            if not await self._validate_embedding_compatibility(query_vector):
+            if not self._validate_embedding_compatibility(query_vector):
                 self.logger.warning("Query embedding may not be compatible with stored vectors")
 
             # Search in Qdrant for similar vectors
             search_start = time.time()
             similar_chunks = self.storage_service.search_similar(
                 query_vector,
-                limit=top_k
+                limit=top_k,
+                score_threshold=score_threshold
             )
             search_time = time.time() - search_start
 
-            # Apply score threshold if specified
-            if score_threshold is not None:
-                filtered_chunks = [chunk for chunk in similar_chunks if chunk['score'] >= score_threshold]
-            else:
-                filtered_chunks = similar_chunks
-
             # Format the results according to the data model
             format_start = time.time()
-            documents = []
-            relevance_scores = []
-            sources = []
-
-            for chunk in filtered_chunks:
-                documents.append(chunk.get("content", ""))
-                relevance_scores.append(chunk.get("score", 0))
-
-                source_info = {
-                    "document_id": chunk.get("id", ""),
-                    "page_number": chunk.get("page_number"),  # This may be None if not stored
-                    "section_title": chunk.get("section", ""),
-                    "excerpt": chunk.get("content", "")[:200] + "..." if len(chunk.get("content", "")) > 200 else chunk.get("content", "")
-                }
-                # Only include optional fields if they have values
-                if source_info["page_number"] is not None:
-                    sources.append(source_info)
-                else:
-                    # Remove page_number key if it's None
-                    source_info.pop("page_number", None)
-                    sources.append(source_info)
-
+            documents, relevance_scores, sources = self._format_results(similar_chunks)
             format_time = time.time() - format_start
 
             total_time = time.time() - start_time
@@ -123,52 +110,25 @@ class RetrievalService(BaseService):
 
             # Generate embedding for the combined query
             embedding_start = time.time()
-            query_embedding = await self.embedding_service.generate_embeddings_with_retry([full_query])
-            query_vector = query_embedding[0]  # Extract the single embedding
+            query_vector = await self._embed_query(full_query)
             embedding_time = time.time() - embedding_start
 
             # Verify embedding compatibility with stored vectors
-            if not await self._validate_embedding_compatibility(query_vector):
+            if not self._validate_embedding_compatibility(query_vector):
                 self.logger.warning("Query embedding may not be compatible with stored vectors")
 
             # Search in Qdrant for similar vectors
             search_start = time.time()
             similar_chunks = self.storage_service.search_similar(
                 query_vector,
-                limit=top_k
+                limit=top_k,
+                score_threshold=score_threshold
             )
             search_time = time.time() - search_start
 
-            # Apply score threshold if specified
-            if score_threshold is not None:
-                filtered_chunks = [chunk for chunk in similar_chunks if chunk['score'] >= score_threshold]
-            else:
-                filtered_chunks = similar_chunks
-
             # Format the results according to the data model
             format_start = time.time()
-            documents = []
-            relevance_scores = []
-            sources = []
-
-            for chunk in filtered_chunks:
-                documents.append(chunk.get("content", ""))
-                relevance_scores.append(chunk.get("score", 0))
-
-                source_info = {
-                    "document_id": chunk.get("id", ""),
-                    "page_number": chunk.get("page_number"),  # This may be None if not stored
-                    "section_title": chunk.get("section", ""),
-                    "excerpt": chunk.get("content", "")[:200] + "..." if len(chunk.get("content", "")) > 200 else chunk.get("content", "")
-                }
-                # Only include optional fields if they have values
-                if source_info["page_number"] is not None:
-                    sources.append(source_info)
-                else:
-                    # Remove page_number key if it's None
-                    source_info.pop("page_number", None)
-                    sources.append(source_info)
-
+            documents, relevance_scores, sources = self._format_results(similar_chunks)
             format_time = time.time() - format_start
 
             total_time = time.time() - start_time
@@ -192,28 +152,72 @@ class RetrievalService(BaseService):
             self.logger.error(f"Error retrieving context with selected text: {str(e)}")
             raise e
 
-    async def _validate_embedding_compatibility(self, query_embedding: List[float]) -> bool:
+    async def _embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query, reusing the cached vector when the same text was seen recently
+        """
+        key = hashlib.blake2b(query.encode("utf-8"), digest_size=16).digest()
+        cached = self._emb_cache.get(key)
+        if cached is not None:
+            self._emb_cache.move_to_end(key)
+            return cached
+
+        query_vector = await self.query_embedder.embed(query)
+        self._emb_cache[key] = query_vector
+        if len(self._emb_cache) > settings.query_embedding_cache_size:
+            self._emb_cache.popitem(last=False)  # Evict the least recently used entry
+        return query_vector
+
+    def _format_results(self, chunks: List[Dict[str, Any]]) -> Tuple[List[str], List[float], List[Dict[str, Any]]]:
+        """
+        Build the documents, relevance scores and sources lists in a single pass
+        """
+        documents = []
+        relevance_scores = []
+        sources = []
+
+        for chunk in chunks:
+            content = chunk.get("content", "")
+            documents.append(content)
+            relevance_scores.append(chunk.get("score", 0))
+
+            source_info = {"document_id": chunk.get("id", "")}
+            # Only include page_number if it was stored
+            page_number = chunk.get("page_number")
+            if page_number is not None:
+                source_info["page_number"] = page_number
+            source_info["section_title"] = chunk.get("section", "")
+            source_info["excerpt"] = content[:200] + "..." if len(content) > 200 else content
+            sources.append(source_info)
+
+        return documents, relevance_scores, sources
+
+    def _get_expected_dimension(self) -> Optional[int]:
+        """
+        Read the collection's vector size once per process, shared by every instance
+        """
+        collection_name = self.storage_service.collection_name
+        expected_dim = RetrievalService._expected_dims.get(collection_name)
+        if expected_dim is None:
+            collection_info = self.storage_service.client.get_collection(collection_name)
+            expected_dim = collection_info.config.params.vectors.size
+            RetrievalService._expected_dims[collection_name] = expected_dim
+        return expected_dim
+
+    def _validate_embedding_compatibility(self, query_embedding: List[float]) -> bool:
         """
         Validate that the query embedding is compatible with stored embeddings
         """
         try:
-            # Retrieve a sample of stored embeddings to check dimension compatibility
-            # We'll use the storage service to get a few random vectors
-            sample_chunks = self.storage_service.search_similar(
-                query_embedding,
-                limit=1  # Just get one result to check embedding dimensions
-            )
-
-            if sample_chunks:
-                # Check if the first result has a compatible embedding
-                first_chunk = sample_chunks[0]
-                stored_embedding = first_chunk.get('embedding', [0] * len(query_embedding))  # Fallback if no embedding in payload
-                return len(query_embedding) == len(stored_embedding)
-
-            # If no results found, try to get any random chunk
-            # For now we'll just check the Cohere model embedding dimension
-            return True  # Assuming Cohere model consistency
-
+            return len(query_embedding) == self._get_expected_dimension()
         except Exception as e:
             self.logger.error(f"Error validating embedding compatibility: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+
+async def close_query_embedder():
+    """
+    Stop the shared query embedder's background worker (app shutdown, CLI exit)
+    """
+    if RetrievalService._query_embedder is not None:
+        await RetrievalService._query_embedder.aclose()
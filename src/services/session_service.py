@@ -2,7 +2,10 @@
 Session service for the ChatKit RAG integration.
 Manages conversational context and session state across multiple exchanges.
 """
-from typing import Dict, List, Optional
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, List, Optional, Tuple
+import heapq
 import uuid
 from datetime import datetime, timedelta
 
@@ -19,11 +22,15 @@ class SessionService:
     def __init__(self):
         # In-memory storage for sessions (in production, use Redis or database)
         self.sessions: Dict[str, ChatSession] = {}
-        # Store conversation history for each session
-        self.conversations: Dict[str, List[dict]] = {}
+        # Store conversation history for each session; the bounded deque
+        # drops the oldest message once MAX_CONVERSATION_HISTORY is reached
+        self.conversations: Dict[str, Deque[dict]] = {}
         
         # Session timeout configuration
         self.session_timeout = timedelta(minutes=SESSION_TIMEOUT_MINUTES)
+        # Min-heap of (expiry time, session id), one entry per session;
+        # an entry made stale by later activity is re-pushed when popped
+        self._expiry_heap: List[Tuple[datetime, str]] = []
     
     async def create_session(self, user_id: Optional[str] = None) -> ChatSession:
         """
@@ -41,7 +48,8 @@ class SessionService:
         )
         
         self.sessions[session_id] = session
-        self.conversations[session_id] = []
+        self.conversations[session_id] = deque(maxlen=MAX_CONVERSATION_HISTORY)
+        heapq.heappush(self._expiry_heap, (session.last_interaction + self.session_timeout, session_id))
         
         return session
     
@@ -83,15 +91,9 @@ class SessionService:
         Add a message to the conversation history for a session.
         """
         if session_id not in self.conversations:
-            self.conversations[session_id] = []
+            self.conversations[session_id] = deque(maxlen=MAX_CONVERSATION_HISTORY)
         
         self.conversations[session_id].append(message)
-        
-        # Limit conversation history to prevent memory issues
-        # (Keep only the last N exchanges)
-        if len(self.conversations[session_id]) > MAX_CONVERSATION_HISTORY:
-            # Keep only the most recent messages
-            self.conversations[session_id] = self.conversations[session_id][-MAX_CONVERSATION_HISTORY:]
     
     async def get_conversation_history(self, session_id: str, limit: int = 10) -> List[dict]:
         """
@@ -102,7 +104,7 @@ class SessionService:
         
         # Return the most recent messages up to the limit
         history = self.conversations[session_id]
-        return history[-limit:] if len(history) > limit else history
+        return list(islice(history, max(0, len(history) - limit), None))
     
     async def deactivate_session(self, session_id: str):
         """
@@ -118,21 +120,154 @@ class SessionService:
         This should be run periodically as a background task.
         """
         current_time = datetime.now()
-        expired_sessions = []
         
-        for session_id, session in self.sessions.items():
-            if current_time - session.last_interaction > self.session_timeout:
-                expired_sessions.append(session_id)
+        # Only sessions whose recorded expiry has passed are examined
+        while self._expiry_heap and self._expiry_heap[0][0] < current_time:
+            _, session_id = heapq.heappop(self._expiry_heap)
+            session = self.sessions.get(session_id)
+            if session is None:
+                continue
+            
+            expires_at = session.last_interaction + self.session_timeout
+            if expires_at < current_time:
+                del self.sessions[session_id]
+                self.conversations.pop(session_id, None)
+            else:
+                # Active since the entry was pushed; track its new expiry
+                heapq.heappush(self._expiry_heap, (expires_at, session_id))
+
+
+class RedisSessionService(SessionService):
+    """
+    Session service backed by Redis so session state is shared across workers.
+    Sessions are msgpack-encoded under sess:{id} and conversations are Redis
+    lists under conv:{id}; both expire via TTL, so no cleanup scan is needed.
+    """
+    
+    def __init__(self, redis_url: str):
+        super().__init__()
+        # Imported lazily so the in-memory backend has no Redis dependency
+        import msgpack
+        import redis.asyncio as redis
         
-        for session_id in expired_sessions:
-            del self.sessions[session_id]
-            if session_id in self.conversations:
-                del self.conversations[session_id]
+        self._msgpack = msgpack
+        self.redis = redis.Redis.from_url(redis_url)
+    
+    @staticmethod
+    def _session_key(session_id: str) -> str:
+        return f"sess:{session_id}"
+    
+    @staticmethod
+    def _conversation_key(session_id: str) -> str:
+        return f"conv:{session_id}"
+    
+    @property
+    def _ttl_seconds(self) -> int:
+        return max(1, int(self.session_timeout.total_seconds()))
+    
+    async def _save_session(self, session: ChatSession, keep_ttl: bool = False):
+        data = self._msgpack.packb(session.model_dump(mode="json"))
+        if keep_ttl:
+            await self.redis.set(self._session_key(session.id), data, keepttl=True)
+        else:
+            await self.redis.set(self._session_key(session.id), data, ex=self._ttl_seconds)
+    
+    async def _load_session(self, session_id: str) -> Optional[ChatSession]:
+        data = await self.redis.get(self._session_key(session_id))
+        if data is None:
+            return None
+        return ChatSession.model_validate(self._msgpack.unpackb(data))
+    
+    async def create_session(self, user_id: Optional[str] = None) -> ChatSession:
+        """
+        Create a new chat session.
+        """
+        now = datetime.now()
+        session = ChatSession(
+            id=str(uuid.uuid4()),
+            created_at=now,
+            last_interaction=now,
+            user_id=user_id,
+            is_active=True,
+            query_count=0
+        )
+        
+        await self._save_session(session)
+        return session
+    
+    async def get_session(self, session_id: str) -> Optional[ChatSession]:
+        """
+        Retrieve an existing session by ID. Expired sessions have already been
+        evicted by Redis.
+        """
+        return await self._load_session(session_id)
+    
+    async def update_session_interaction(self, session_id: str) -> Optional[ChatSession]:
+        """
+        Update the last interaction time for a session and refresh its TTL.
+        """
+        session = await self._load_session(session_id)
+        if session is None:
+            return None
+        
+        session.last_interaction = datetime.now()
+        session.query_count += 1
+        session.is_active = True
+        
+        await self._save_session(session)
+        await self.redis.expire(self._conversation_key(session_id), self._ttl_seconds)
+        return session
+    
+    async def add_message_to_conversation(self, session_id: str, message: dict):
+        """
+        Append a message, keeping only the last MAX_CONVERSATION_HISTORY entries.
+        """
+        key = self._conversation_key(session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, self._msgpack.packb(message))
+            pipe.ltrim(key, -MAX_CONVERSATION_HISTORY, -1)
+            pipe.expire(key, self._ttl_seconds)
+            await pipe.execute()
+    
+    async def get_conversation_history(self, session_id: str, limit: int = 10) -> List[dict]:
+        """
+        Retrieve the most recent messages for a session, oldest first.
+        """
+        if limit <= 0:
+            return []
+        
+        entries = await self.redis.lrange(self._conversation_key(session_id), -limit, -1)
+        return [self._msgpack.unpackb(entry) for entry in entries]
+    
+    async def deactivate_session(self, session_id: str):
+        """
+        Mark a session as inactive without extending its lifetime.
+        """
+        session = await self._load_session(session_id)
+        if session is not None:
+            session.is_active = False
+            await self._save_session(session, keep_ttl=True)
+    
+    async def cleanup_expired_sessions(self):
+        """
+        No-op: Redis evicts expired sessions and conversations via TTL.
+        """
+        return None
+
+
+def _create_session_service() -> SessionService:
+    """
+    Use the Redis backend when REDIS_URL is configured, otherwise keep
+    sessions in process memory.
+    """
+    if settings.REDIS_URL:
+        return RedisSessionService(settings.REDIS_URL)
+    return SessionService()
 
 
 # Global instance of SessionService
 # In a real application, this would be managed by a dependency injection system
-session_service = SessionService()
+session_service = _create_session_service()
 
 
 # Dependency for FastAPI
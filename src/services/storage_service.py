@@ -1,85 +1,245 @@
-from qdrant_client import QdrantClient
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+import httpx
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models
-from typing import List, Optional, Dict, Any
+import numpy as np
+from typing import ClassVar, Iterable, List, Optional, Set, Dict, Any, Tuple
 from uuid import UUID
 from src.config.settings import settings
 from src.models.content_chunk import ContentChunk
 
 
+logger = logging.getLogger(__name__)
+
+
+# Payload fields returned by search_similar
+_SEARCH_PAYLOAD_FIELDS = ["content", "source_url", "section"]
+
+
+def _build_payload(chunk: ContentChunk, point_id: str) -> Dict[str, Any]:
+    """
+    Build the Qdrant payload stored alongside a chunk's vector
+    """
+    created_at = chunk.created_at_iso
+    # Freshly created chunks share one timestamp, so format it only once
+    if chunk.updated_at == chunk.created_at:
+        updated_at = created_at
+    else:
+        updated_at = chunk.updated_at.isoformat()
+
+    return {
+        "content": chunk.content,
+        "source_url": chunk.source_url,
+        "section": chunk.section,
+        "metadata": chunk.metadata,
+        "id": point_id,
+        "created_at": created_at,
+        "updated_at": updated_at
+    }
+
+
+def _build_point(chunk: ContentChunk, point_id: Optional[str] = None) -> models.PointStruct:
+    """
+    Build the Qdrant point (vector + payload) for a chunk
+    """
+    if point_id is None:
+        point_id = str(chunk.id)
+
+    return models.PointStruct(
+        id=point_id,
+        vector=chunk.embedding,
+        payload=_build_payload(chunk, point_id)
+    )
+
+
 class QdrantService:
     """
     Service class for interacting with Qdrant vector database
     """
     
+    # Collections this process has already checked or created, so only the
+    # first instance pays the get_collection round-trip
+    _ready_collections: ClassVar[Set[str]] = set()
+    _init_lock: ClassVar[threading.Lock] = threading.Lock()
+    # Bulk loads in progress per collection; indexing stays paused until the
+    # last one finishes
+    _bulk_ingests: ClassVar[Dict[str, int]] = {}
+    _bulk_lock: ClassVar[threading.Lock] = threading.Lock()
+    
     def __init__(self):
-        # Initialize Qdrant client
-        if settings.qdrant_api_key:
-            self.client = QdrantClient(
-                url=settings.qdrant_url,
-                api_key=settings.qdrant_api_key
+        # Initialize Qdrant clients (the async one is used by the ingest pipeline);
+        # with prefer_grpc, upserts and searches go over protobuf/HTTP2 instead of JSON.
+        # REST calls share one keep-alive connection pool per client, sized for
+        # concurrent stores and searches rather than httpx's default
+        client_options = {
+            "url": settings.qdrant_url,
+            "prefer_grpc": settings.qdrant_prefer_grpc,
+            "grpc_port": settings.qdrant_grpc_port,
+            "timeout": settings.qdrant_timeout,
+            "limits": httpx.Limits(
+                max_connections=settings.qdrant_max_connections,
+                max_keepalive_connections=settings.qdrant_max_keepalive_connections
             )
-        else:
-            self.client = QdrantClient(url=settings.qdrant_url)
+        }
+        if settings.qdrant_api_key:
+            client_options["api_key"] = settings.qdrant_api_key
+
+        self.client = QdrantClient(**client_options)
+        self.async_client = AsyncQdrantClient(**client_options)
         
         self.collection_name = settings.qdrant_collection_name
-        self._initialize_collection()
+        # Points per upsert request and concurrent requests on the bulk ingest path
+        self.upsert_batch_size = settings.qdrant_batch_size
+        self.upload_concurrency = settings.qdrant_upload_concurrency
+        # LRU of point ids known to exist, so repeat writes can skip the
+        # existence check round-trip
+        self._seen_ids: "OrderedDict[str, None]" = OrderedDict()
+        # LRU of (expiry, results) keyed by a hash of the query vector and search
+        # parameters. Local writes clear it; the TTL bounds staleness from writes
+        # made by other processes or not yet applied by Qdrant (wait=False)
+        self._search_cache: "OrderedDict[bytes, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._ensure_collection()
+    
+    def _ensure_collection(self):
+        """
+        Initialize the collection once per process
+        """
+        if self.collection_name in QdrantService._ready_collections:
+            return
+        with QdrantService._init_lock:
+            if self.collection_name not in QdrantService._ready_collections:
+                self._initialize_collection()
+                QdrantService._ready_collections.add(self.collection_name)
     
     def _initialize_collection(self):
         """
         Initialize the Qdrant collection if it doesn't exist
         """
-        try:
-            # Check if collection exists
-            self.client.get_collection(self.collection_name)
-        except:
-            # If collection doesn't exist, create it
+        # Only a missing collection is created; errors reaching Qdrant propagate
+        # instead of being mistaken for "not found" and wiping the index
+        if not self.client.collection_exists(self.collection_name):
             # We'll assume the embedding dimension based on Cohere's default (1024 for multilingual model)
-            self.client.recreate_collection(
+            self.client.create_collection(
                 collection_name=self.collection_name,
                 vectors_config=models.VectorParams(size=768, distance=models.Distance.COSINE),  # Adjust size as needed
+                # Keep int8-quantized vectors in RAM for search; originals are used for rescoring.
+                # The 0.99 quantile keeps outlier components from stretching the int8 range
+                quantization_config=models.ScalarQuantization(
+                    scalar=models.ScalarQuantizationConfig(
+                        type=models.ScalarType.INT8,
+                        quantile=0.99,
+                        always_ram=True
+                    )
+                )
             )
     
+    def _begin_bulk_ingest(self) -> bool:
+        """
+        Count a bulk load on the collection; True if indexing must be paused
+        """
+        with QdrantService._bulk_lock:
+            active = QdrantService._bulk_ingests.get(self.collection_name, 0)
+            QdrantService._bulk_ingests[self.collection_name] = active + 1
+        return active == 0
+
+    def _end_bulk_ingest(self) -> bool:
+        """
+        Release a bulk load on the collection; True if indexing must be resumed
+        """
+        with QdrantService._bulk_lock:
+            active = QdrantService._bulk_ingests.get(self.collection_name, 0) - 1
+            if active > 0:
+                QdrantService._bulk_ingests[self.collection_name] = active
+            else:
+                QdrantService._bulk_ingests.pop(self.collection_name, None)
+        return active <= 0
+
+    @contextmanager
+    def bulk_ingest(self):
+        """
+        Pause HNSW indexing while a bulk load runs, so the index is built once
+        afterwards instead of being updated on every upsert:
+
+            with storage_service.bulk_ingest():
+                storage_service.store_chunks(chunks)
+
+        Overlapping bulk loads share the pause; the last one to finish restores
+        settings.qdrant_indexing_threshold
+        """
+        pause = self._begin_bulk_ingest()
+        try:
+            # Inside the try, so a failed pause still releases this bulk load
+            if pause:
+                self.client.update_collection(
+                    collection_name=self.collection_name,
+                    optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0)
+                )
+            yield
+        finally:
+            if self._end_bulk_ingest():
+                self.client.update_collection(
+                    collection_name=self.collection_name,
+                    optimizers_config=models.OptimizersConfigDiff(
+                        indexing_threshold=settings.qdrant_indexing_threshold
+                    )
+                )
+
+    @asynccontextmanager
+    async def async_bulk_ingest(self):
+        """
+        Async variant of bulk_ingest for the ingest pipeline
+        """
+        pause = self._begin_bulk_ingest()
+        try:
+            # Inside the try, so a failed pause still releases this bulk load
+            if pause:
+                await self.async_client.update_collection(
+                    collection_name=self.collection_name,
+                    optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0)
+                )
+            yield
+        finally:
+            if self._end_bulk_ingest():
+                await self.async_client.update_collection(
+                    collection_name=self.collection_name,
+                    optimizers_config=models.OptimizersConfigDiff(
+                        indexing_threshold=settings.qdrant_indexing_threshold
+                    )
+                )
+
     def store_chunk(self, chunk: ContentChunk) -> bool:
         """
         Store a single content chunk in Qdrant
         """
         try:
+            chunk_id = str(chunk.id)
+
             # Check if a chunk with this ID already exists to prevent duplicates
-            existing_chunks = self.client.retrieve(
+            if chunk_id in self._seen_ids or self.client.retrieve(
                 collection_name=self.collection_name,
-                ids=[str(chunk.id)]
-            )
-
-            if existing_chunks:
-                print(f"Chunk with ID {chunk.id} already exists, skipping...")
+                ids=[chunk_id]
+            ):
+                self._mark_seen([chunk_id])
+                logger.debug(f"Chunk with ID {chunk.id} already exists, skipping...")
                 return True  # Return True as it's effectively stored
 
-            # Prepare the payload (metadata)
-            payload = {
-                "content": chunk.content,
-                "source_url": chunk.source_url,
-                "section": chunk.section,
-                "metadata": chunk.metadata,
-                "id": str(chunk.id),
-                "created_at": chunk.created_at.isoformat(),
-                "updated_at": chunk.updated_at.isoformat()
-            }
-
             # Store in Qdrant
             self.client.upsert(
                 collection_name=self.collection_name,
-                points=[
-                    models.PointStruct(
-                        id=str(chunk.id),
-                        vector=chunk.embedding,
-                        payload=payload
-                    )
-                ]
+                points=[_build_point(chunk, chunk_id)]
             )
+            self._mark_seen([chunk_id])
+            self._search_cache.clear()
 
             return True
         except Exception as e:
-            print(f"Error storing chunk in Qdrant: {str(e)}")
+            logger.exception(f"Error storing chunk in Qdrant: {str(e)}")
             return False
     
     def store_chunks(self, chunks: List[ContentChunk]) -> bool:
@@ -87,81 +247,177 @@ class QdrantService:
         Store multiple content chunks in Qdrant
         """
         try:
-            # First, check which chunks already exist to avoid duplicates
+            # First, check which chunks already exist to avoid duplicates;
+            # ids already known locally don't need to be asked about
             chunk_ids = [str(chunk.id) for chunk in chunks]
-            existing_chunks = self.client.retrieve(
-                collection_name=self.collection_name,
-                ids=chunk_ids
-            )
+            existing_ids = {chunk_id for chunk_id in chunk_ids if chunk_id in self._seen_ids}
+            unknown_ids = [chunk_id for chunk_id in chunk_ids if chunk_id not in existing_ids]
 
-            # Get IDs of existing chunks
-            existing_ids = {str(chunk.id) for chunk in existing_chunks}
+            if unknown_ids:
+                existing_chunks = self.client.retrieve(
+                    collection_name=self.collection_name,
+                    ids=unknown_ids
+                )
+                existing_ids.update(str(chunk.id) for chunk in existing_chunks)
+            self._mark_seen(existing_ids)
 
-            # Only process chunks that don't already exist
-            new_chunks = [chunk for chunk in chunks if str(chunk.id) not in existing_ids]
+            # Only build points for chunks that don't already exist
+            points = [
+                _build_point(chunk, chunk_id)
+                for chunk, chunk_id in zip(chunks, chunk_ids)
+                if chunk_id not in existing_ids
+            ]
 
-            if not new_chunks:
-                print(f"All {len(chunks)} chunks already exist, no new chunks to store")
+            if not points:
+                logger.debug(f"All {len(chunks)} chunks already exist, no new chunks to store")
                 return True
 
-            points = []
-            for chunk in new_chunks:
-                payload = {
-                    "content": chunk.content,
-                    "source_url": chunk.source_url,
-                    "section": chunk.section,
-                    "metadata": chunk.metadata,
-                    "id": str(chunk.id),
-                    "created_at": chunk.created_at.isoformat(),
-                    "updated_at": chunk.updated_at.isoformat()
-                }
-
-                points.append(
-                    models.PointStruct(
-                        id=str(chunk.id),
-                        vector=chunk.embedding,
-                        payload=payload
-                    )
-                )
-
             # Store all new points in a single operation
             self.client.upsert(
                 collection_name=self.collection_name,
                 points=points
             )
+            self._mark_seen(point.id for point in points)
+            self._search_cache.clear()
 
-            print(f"Stored {len(points)} new chunks out of {len(chunks)} total")
+            logger.info(f"Stored {len(points)} new chunks out of {len(chunks)} total")
             return True
         except Exception as e:
-            print(f"Error storing chunks in Qdrant: {str(e)}")
+            logger.exception(f"Error storing chunks in Qdrant: {str(e)}")
             return False
     
-    def search_similar(self, query_embedding: List[float], limit: int = 10) -> List[Dict[str, Any]]:
+    async def async_store_chunks(self, chunks: List[ContentChunk]) -> bool:
+        """
+        Store multiple content chunks in Qdrant without blocking the event loop,
+        uploading fixed-size sub-batches concurrently
+        """
+        try:
+            # Chunk ids are unique UUIDs and upsert overwrites by id, so no
+            # existence check round-trip is needed before writing
+            points = [_build_point(chunk) for chunk in chunks]
+            semaphore = asyncio.Semaphore(self.upload_concurrency)
+
+            async def upsert_batch(batch: List[models.PointStruct]):
+                async with semaphore:
+                    await self.async_client.upsert(
+                        collection_name=self.collection_name,
+                        points=batch,
+                        wait=False
+                    )
+
+            await asyncio.gather(*(
+                upsert_batch(points[i:i + self.upsert_batch_size])
+                for i in range(0, len(points), self.upsert_batch_size)
+            ))
+            self._mark_seen(point.id for point in points)
+            self._search_cache.clear()
+
+            logger.info(f"Stored {len(points)} chunks")
+            return True
+        except Exception as e:
+            logger.exception(f"Error storing chunks in Qdrant: {str(e)}")
+            return False
+
+    async def async_store_batch(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        payloads: List[Dict[str, Any]]
+    ) -> bool:
         """
-        Search for similar content chunks based on embedding similarity
+        Store freshly generated points in Qdrant from parallel id/vector/payload arrays
         """
         try:
-            results = self.client.search(
+            await self.async_client.upsert(
                 collection_name=self.collection_name,
-                query_vector=query_embedding,
-                limit=limit
+                points=models.Batch(
+                    ids=ids,
+                    vectors=vectors.tolist(),
+                    payloads=payloads
+                )
             )
+            self._search_cache.clear()
+
+            logger.info(f"Stored {len(ids)} new chunks")
+            return True
+        except Exception as e:
+            logger.exception(f"Error storing chunks in Qdrant: {str(e)}")
+            return False
+
+    def _mark_seen(self, point_ids: Iterable[str]):
+        """
+        Record point ids as stored, evicting the least recently seen beyond the cache size
+        """
+        for point_id in point_ids:
+            self._seen_ids[point_id] = None
+            self._seen_ids.move_to_end(point_id)
+        while len(self._seen_ids) > settings.qdrant_seen_ids_cache_size:
+            self._seen_ids.popitem(last=False)
+    
+    def search_similar(
+        self,
+        query_embedding: List[float],
+        limit: int = 10,
+        score_threshold: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for similar content chunks based on embedding similarity,
+        optionally dropping results scored below score_threshold
+        """
+        try:
+            # Frequent queries repeat, so identical searches are answered from the cache
+            key = hashlib.blake2b(
+                np.asarray(query_embedding, dtype=np.float32).tobytes()
+                + repr((limit, score_threshold)).encode(),
+                digest_size=16
+            ).digest()
+            cached = self._search_cache.get(key)
+            if cached is not None:
+                expires_at, cached_chunks = cached
+                if expires_at > time.monotonic():
+                    self._search_cache.move_to_end(key)
+                    return [dict(chunk) for chunk in cached_chunks]
+                del self._search_cache[key]
+            
+            # The threshold is applied by Qdrant alongside the similarity scoring,
+            # and only the payload fields returned to callers are sent back
+            results = self.client.query_points(
+                collection_name=self.collection_name,
+                query=query_embedding,
+                limit=limit,
+                score_threshold=score_threshold,
+                # Oversample on the int8 vectors, then rescore with the originals to keep recall
+                search_params=models.SearchParams(
+                    quantization=models.QuantizationSearchParams(
+                        rescore=True,
+                        oversampling=settings.qdrant_search_oversampling
+                    )
+                ),
+                with_payload=models.PayloadSelectorInclude(include=_SEARCH_PAYLOAD_FIELDS),
+                with_vectors=False
+            ).points
             
             # Extract relevant information from results
-            similar_chunks = []
-            for result in results:
-                chunk_info = {
+            similar_chunks = [
+                {
                     "id": result.id,
                     "content": result.payload.get("content", ""),
                     "source_url": result.payload.get("source_url", ""),
                     "section": result.payload.get("section", ""),
                     "score": result.score
                 }
-                similar_chunks.append(chunk_info)
+                for result in results
+            ]
             
-            return similar_chunks
+            self._search_cache[key] = (
+                time.monotonic() + settings.qdrant_search_cache_ttl,
+                similar_chunks
+            )
+            if len(self._search_cache) > settings.qdrant_search_cache_size:
+                self._search_cache.popitem(last=False)  # Evict the least recently used entry
+            return [dict(chunk) for chunk in similar_chunks]
         except Exception as e:
-            print(f"Error searching in Qdrant: {str(e)}")
+            logger.exception(f"Error searching in Qdrant: {str(e)}")
             return []
     
     def get_chunk_by_id(self, chunk_id: str) -> Optional[Dict[str, Any]]:
@@ -186,7 +442,7 @@ class QdrantService:
             else:
                 return None
         except Exception as e:
-            print(f"Error retrieving chunk from Qdrant: {str(e)}")
+            logger.exception(f"Error retrieving chunk from Qdrant: {str(e)}")
             return None
     
     def delete_chunk_by_id(self, chunk_id: str) -> bool:
@@ -200,7 +456,28 @@ class QdrantService:
                     points=[chunk_id]
                 )
             )
+            # Forget the id so a later store writes the point again
+            self._seen_ids.pop(chunk_id, None)
+            self._search_cache.clear()
             return True
         except Exception as e:
-            print(f"Error deleting chunk from Qdrant: {str(e)}")
-            return False
\ No newline at end of file
+            logger.exception(f"Error deleting chunk from Qdrant: {str(e)}")
+            return False
+
+
+_qdrant_service: Optional[QdrantService] = None
+_qdrant_service_lock = threading.Lock()
+
+
+# Dependency for FastAPI
+def get_qdrant_service() -> QdrantService:
+    """
+    Return the process-wide QdrantService, so request handlers share its clients;
+    the clients are thread-safe and should not be reconstructed per request
+    """
+    global _qdrant_service
+    if _qdrant_service is None:
+        with _qdrant_service_lock:
+            if _qdrant_service is None:
+                _qdrant_service = QdrantService()
+    return _qdrant_service
@@ -1,9 +1,14 @@
 """
 Validation helper service for API endpoint validation.
 """
+import logging
 import re
 from typing import Dict, Any, Optional
-from src.utils.logging import setup_logging
+
+
+# Control characters other than tab, newline and carriage return, as UTF-8
+# bytes; multi-byte UTF-8 sequences never contain bytes below 0x80
+_CONTROL_BYTES = bytes(i for i in range(32) if i not in (9, 10, 13))
 
 
 class ValidationHelper:
@@ -12,7 +17,7 @@ class ValidationHelper:
     """
     
     def __init__(self):
-        self.logger = setup_logging()
+        self.logger = logging.getLogger(__name__)
     
     def validate_query_format(self, query_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -137,10 +142,9 @@ class ValidationHelper:
             True if content is valid, False otherwise
         """
         # Check for control characters (except common whitespace)
-        for char in content:
-            if ord(char) < 32 and char not in ['\n', '\r', '\t']:
-                return False
-        return True
+        # bytes.translate deletes them in a single C pass; nothing removed means none present
+        encoded = content.encode('utf-8', 'surrogatepass')
+        return len(encoded.translate(None, _CONTROL_BYTES)) == len(encoded)
 
 
 # Create a global instance for easy access
@@ -2,9 +2,12 @@
 Validation service for the ChatKit RAG integration.
 Implements response accuracy verification and grounding checks.
 """
-from typing import List, Tuple
+from functools import lru_cache
+from typing import FrozenSet, List, Optional, Tuple
 import logging
 
+import numpy as np
+
 from ..chat.models import RetrievedContext
 from ..rag.services import RAGService
 from ..models.validation_models import ValidationRequest, ValidationResponse
@@ -12,6 +15,28 @@ from ..models.validation_models import ValidationRequest, ValidationResponse
 
 logger = logging.getLogger(__name__)
 
+# (word set, word hashes, similarity score, source document) for one retrieved context
+TokenizedContext = Tuple[FrozenSet[str], np.ndarray, float, str]
+
+
+@lru_cache(maxsize=4096)
+def _tokenize(text: str) -> FrozenSet[str]:
+    """
+    Lowercase and split text into its set of words, cached across validations.
+    """
+    return frozenset(text.lower().split())
+
+
+@lru_cache(maxsize=4096)
+def _token_hashes(text: str) -> np.ndarray:
+    """
+    Hash each distinct word of the text into an int64 array, cached across validations.
+    """
+    words = _tokenize(text)
+    hashes = np.fromiter((hash(word) for word in words), dtype=np.int64, count=len(words))
+    hashes.flags.writeable = False  # Shared through the cache
+    return hashes
+
 
 class ValidationService:
     """
@@ -32,20 +57,46 @@ class ValidationService:
         Validate that a response is properly grounded in the retrieved contexts.
         Returns: (is_accurate, confidence_score, supporting_sources)
         """
+        # Tokenize the contexts once and share them between both checks
+        tokenized_contexts = self._tokenize_contexts(retrieved_contexts)
+
         # Check if response content is supported by retrieved contexts
-        accuracy_score = self._calculate_response_accuracy(response, retrieved_contexts)
+        accuracy_score = self._calculate_response_accuracy(
+            response, retrieved_contexts, tokenized_contexts
+        )
         
         # Determine if the response is sufficiently grounded
         is_accurate = accuracy_score >= 0.7  # Threshold for accuracy
         
         # Get the sources that support the response
-        supporting_sources = self._get_supporting_sources(response, retrieved_contexts)
+        supporting_sources = self._get_supporting_sources(
+            response, retrieved_contexts, tokenized_contexts
+        )
         
         logger.info(f"Response validation: accuracy={accuracy_score}, is_accurate={is_accurate}")
         
         return is_accurate, accuracy_score, supporting_sources
     
-    def _calculate_response_accuracy(self, response: str, contexts: List[RetrievedContext]) -> float:
+    def _tokenize_contexts(self, contexts: List[RetrievedContext]) -> List[TokenizedContext]:
+        """
+        Split each context into its word set and word hashes alongside its score and source.
+        """
+        return [
+            (
+                _tokenize(context.content),
+                _token_hashes(context.content),
+                context.similarity_score,
+                context.source_document
+            )
+            for context in contexts
+        ]
+    
+    def _calculate_response_accuracy(
+        self,
+        response: str,
+        contexts: List[RetrievedContext],
+        tokenized_contexts: Optional[List[TokenizedContext]] = None
+    ) -> float:
         """
         Calculate how well the response is supported by the retrieved contexts.
         This is a simplified implementation - in production, use more sophisticated NLP techniques.
@@ -53,47 +104,56 @@ class ValidationService:
         if not contexts:
             return 0.0
         
-        response_lower = response.lower()
-        total_support_score = 0.0
+        if tokenized_contexts is None:
+            tokenized_contexts = self._tokenize_contexts(contexts)
+        
+        # Empty contexts and zero-relevance contexts add nothing to the score,
+        # so they are left out of the vectorized pass
+        response_hashes = _token_hashes(response)
+        contributing = [
+            (hashes, score) for _, hashes, score, _ in tokenized_contexts
+            if len(hashes) and score > 0
+        ]
+        if not contributing or not len(response_hashes):
+            return 0.0
         
-        for context in contexts:
-            context_lower = context.content.lower()
-            
-            # Count how many context phrases appear in the response
-            context_words = set(context_lower.split())
-            response_words = set(response_lower.split())
-            
-            # Calculate overlap between context and response
-            intersection = context_words.intersection(response_words)
-            if context_words:  # Avoid division by zero
-                overlap_score = len(intersection) / len(context_words)
-                total_support_score += overlap_score * context.similarity_score  # Weight by context relevance
+        # Look up the words of every context in the response with one vectorized
+        # membership test, then sum the matches per context
+        sizes = np.array([len(hashes) for hashes, _ in contributing])
+        scores = np.array([score for _, score in contributing], dtype=np.float64)
+        matches = np.isin(np.concatenate([hashes for hashes, _ in contributing]), response_hashes)
+        match_counts = np.concatenate(([0], np.cumsum(matches)))
+        ends = np.cumsum(sizes)
+        overlaps = match_counts[ends] - match_counts[ends - sizes]
+        
+        # Overlap ratio weighted by context relevance
+        total_support_score = np.sum(overlaps / sizes * scores)
         
         # Normalize the score based on number of contexts
-        avg_support_score = total_support_score / len(contexts) if contexts else 0.0
+        avg_support_score = float(total_support_score) / len(contexts)
         
         # Ensure the score is between 0 and 1
         return min(1.0, avg_support_score)
     
-    def _get_supporting_sources(self, response: str, contexts: List[RetrievedContext]) -> List[str]:
+    def _get_supporting_sources(
+        self,
+        response: str,
+        contexts: List[RetrievedContext],
+        tokenized_contexts: Optional[List[TokenizedContext]] = None
+    ) -> List[str]:
         """
         Identify which sources support the given response.
         """
-        response_lower = response.lower()
+        if tokenized_contexts is None:
+            tokenized_contexts = self._tokenize_contexts(contexts)
+        
+        response_words = _tokenize(response)
         supporting_sources = set()
         
-        for context in contexts:
-            context_lower = context.content.lower()
-            
-            # Check if there's significant overlap between response and context
-            context_words = set(context_lower.split())
-            response_words = set(response_lower.split())
-            
-            intersection = context_words.intersection(response_words)
-            
-            # If there's enough overlap, consider this source as supporting
-            if len(intersection) > 0:
-                supporting_sources.add(context.source_document)
+        for context_words, _, _, source_document in tokenized_contexts:
+            # If there's any overlap, consider this source as supporting
+            if not context_words.isdisjoint(response_words):
+                supporting_sources.add(source_document)
         
         return list(supporting_sources)
     
@@ -1,77 +1,268 @@
 """
 Content processing utilities
 """
+import copy
+from abc import ABC, abstractmethod
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import re
 
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s\.\,\!\?\;\:\-\n\r]')
+_MAIN_CLASS_RE = re.compile(r'main|content|article')
+
+
+def _collapse_whitespace(text: str) -> str:
+    """
+    Collapse runs of whitespace into single spaces
+    """
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+class _BaseHtmlDocument(ABC):
+    """
+    HTML page parsed once and shared by all content extractors; parser
+    backends provide the node lookup primitives
+    """
+
+    @abstractmethod
+    def _first(self, selector: str) -> Any:
+        """
+        Return the first node matching a CSS selector, or None
+        """
+
+    @abstractmethod
+    def _all_tags(self, name: str) -> List[Any]:
+        """
+        Return every node with the given tag name
+        """
+
+    @abstractmethod
+    def _node_text(self, node: Any) -> str:
+        """
+        Return the text content of a node
+        """
+
+    @abstractmethod
+    def _node_attr(self, node: Any, name: str) -> str:
+        """
+        Return an attribute of a node, or an empty string
+        """
+
+    @abstractmethod
+    def text(self) -> str:
+        """
+        Extract the clean text content of the page
+        """
+
+    @abstractmethod
+    def main_content(self) -> str:
+        """
+        Extract the main content area of the page
+        """
+
+    def title(self) -> Optional[str]:
+        """
+        Extract the page title, falling back to the first h1
+        """
+        title_tag = self._first('title')
+        if title_tag:
+            return self._node_text(title_tag).strip()
+
+        # Fallback: look for h1 tags
+        h1_tag = self._first('h1')
+        if h1_tag:
+            return self._node_text(h1_tag).strip()
+
+        return None
+
+    def metadata(self, url: str) -> Dict[str, Any]:
+        """
+        Extract metadata from the page
+        """
+        metadata = {
+            'url': url,
+            'title': self.title() or '',
+            'description': '',
+            'keywords': [],
+            'author': '',
+            'published_date': ''
+        }
+
+        # Index the content of every meta tag by (attribute, value) in one pass;
+        # like find(), the first tag for each key wins
+        metas: Dict[Tuple[str, str], str] = {}
+        for meta_tag in self._all_tags('meta'):
+            content = self._node_attr(meta_tag, 'content')
+            for attr in ('name', 'property'):
+                value = self._node_attr(meta_tag, attr)
+                if value:
+                    metas.setdefault((attr, value), content)
+
+        def meta_content(*keys: Tuple[str, str]) -> Optional[str]:
+            return next((metas[key] for key in keys if key in metas), None)
+
+        # Extract description
+        description = meta_content(('name', 'description'))
+        if description is not None:
+            metadata['description'] = description
+        else:
+            # Fallback: first paragraph
+            p_tag = self._first('p')
+            if p_tag:
+                metadata['description'] = self._node_text(p_tag)[:160]  # First 160 chars
+
+        # Extract keywords
+        keywords_str = meta_content(('name', 'keywords'))
+        if keywords_str is not None:
+            metadata['keywords'] = [kw.strip() for kw in keywords_str.split(',') if kw.strip()]
+
+        # Extract author
+        metadata['author'] = meta_content(('name', 'author'), ('property', 'author')) or ''
+
+        # Extract published date
+        metadata['published_date'] = meta_content(
+            ('name', 'date'), ('property', 'article:published_time')
+        ) or ''
+
+        return metadata
+
+
+class _LexborDocument(_BaseHtmlDocument):
+    """
+    HTML document backed by selectolax's C lexbor parser
+    """
+
+    _MAIN_SELECTOR = 'div[class*="main"], div[class*="content"], div[class*="article"]'
+
+    def __init__(self, html_content: str):
+        self.tree = LexborHTMLParser(html_content)
+        # Script, style and template contents are never extracted
+        self.tree.strip_tags(['script', 'style', 'template'])
+
+    def _first(self, selector: str) -> Any:
+        return self.tree.css_first(selector)
+
+    def _all_tags(self, name: str) -> List[Any]:
+        return self.tree.css(name)
+
+    def _node_text(self, node: Any) -> str:
+        return node.text()
+
+    def _node_attr(self, node: Any, name: str) -> str:
+        return node.attributes.get(name) or ''
+
+    def text(self) -> str:
+        """
+        Extract clean text content
+        """
+        return _collapse_whitespace(self.tree.root.text() if self.tree.root else '')
+
+    def main_content(self) -> str:
+        """
+        Extract main content, focusing on article or main content areas
+        """
+        # Work on a copy so the shared tree stays intact for other extractors
+        tree = self.tree.clone()
+
+        # Look for main content areas
+        main_content = (
+            tree.css_first('main')
+            or tree.css_first('article')
+            or tree.css_first(self._MAIN_SELECTOR)
+        )
+
+        if not main_content:
+            # Fallback to general text extraction
+            return self.text()
+
+        # Remove navigation, headers, footers, and other non-content elements
+        for element in main_content.css('nav, header, footer, aside'):
+            element.decompose()
+
+        return _collapse_whitespace(main_content.text())
+
+
+class _SoupDocument(_BaseHtmlDocument):
+    """
+    HTML document backed by BeautifulSoup with the lxml parser
+    """
+
+    def __init__(self, html_content: str):
+        self.soup = BeautifulSoup(html_content, 'lxml')
+
+    def _first(self, selector: str) -> Any:
+        return self.soup.select_one(selector)
+
+    def _all_tags(self, name: str) -> List[Any]:
+        return self.soup.find_all(name)
+
+    def _node_text(self, node: Any) -> str:
+        return node.get_text()
+
+    def _node_attr(self, node: Any, name: str) -> str:
+        return node.get(name, '')
+
+    def text(self) -> str:
+        """
+        Extract clean text content; script and style contents are excluded by get_text
+        """
+        return _collapse_whitespace(self.soup.get_text())
+
+    def main_content(self) -> str:
+        """
+        Extract main content, focusing on article or main content areas
+        """
+        # Look for main content areas
+        main_content = (
+            self.soup.find('main')
+            or self.soup.find('article')
+            or self.soup.find('div', class_=_MAIN_CLASS_RE)
+        )
+
+        if not main_content:
+            # Fallback to general text extraction
+            return self.text()
+
+        # Work on a copy so the shared tree stays intact for other extractors
+        main_content = copy.copy(main_content)
+
+        # Remove navigation, headers, footers, and other non-content elements
+        for element in main_content.find_all(['nav', 'header', 'footer', 'aside']):
+            element.decompose()
+
+        return _collapse_whitespace(main_content.get_text())
+
+
+# Prefer the C parser; BeautifulSoup remains the fallback when selectolax isn't installed
+HtmlDocument = _LexborDocument if LexborHTMLParser is not None else _SoupDocument
+
 
 def extract_text_from_html(html_content: str) -> str:
     """
     Extract clean text content from HTML
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Remove script and style elements
-    for script in soup(["script", "style"]):
-        script.decompose()
-    
-    # Get text and clean it up
-    text = soup.get_text()
-    
-    # Break into lines and remove leading/trailing space on each line
-    lines = (line.strip() for line in text.splitlines())
-    # Break multi-headlines into a line each
-    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    # Drop blank lines
-    text = ' '.join(chunk for chunk in chunks if chunk)
-    
-    return text
+    return HtmlDocument(html_content).text()
 
 
 def extract_title_from_html(html_content: str) -> Optional[str]:
     """
     Extract title from HTML content
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    title_tag = soup.find('title')
-    if title_tag:
-        return title_tag.get_text().strip()
-    
-    # Fallback: look for h1 tags
-    h1_tag = soup.find('h1')
-    if h1_tag:
-        return h1_tag.get_text().strip()
-    
-    return None
+    return HtmlDocument(html_content).title()
 
 
 def extract_main_content_from_html(html_content: str) -> str:
     """
     Extract main content from HTML, focusing on article or main content areas
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Look for main content areas
-    main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'main|content|article'))
-    
-    if main_content:
-        # Remove navigation, headers, footers, and other non-content elements
-        for element in main_content.find_all(['nav', 'header', 'footer', 'aside']):
-            element.decompose()
-        
-        # Extract text from the main content area
-        text = main_content.get_text()
-        
-        # Clean up the text
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
-        
-        return text
-    else:
-        # Fallback to general text extraction
-        return extract_text_from_html(html_content)
+    return HtmlDocument(html_content).main_content()
 
 
 def clean_text(text: str) -> str:
@@ -82,10 +273,10 @@ def clean_text(text: str) -> str:
         return ""
     
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE_RE.sub(' ', text)
     
     # Remove special characters that might interfere with processing
-    text = re.sub(r'[^\w\s\.\,\!\?\;\:\-\n\r]', ' ', text)
+    text = _SPECIAL_CHARS_RE.sub(' ', text)
     
     # Strip leading/trailing whitespace
     text = text.strip()
@@ -97,54 +288,4 @@ def get_content_metadata(html_content: str, url: str) -> Dict[str, Any]:
     """
     Extract metadata from HTML content
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    metadata = {
-        'url': url,
-        'title': '',
-        'description': '',
-        'keywords': [],
-        'author': '',
-        'published_date': ''
-    }
-    
-    # Extract title
-    title_tag = soup.find('title')
-    if title_tag:
-        metadata['title'] = title_tag.get_text().strip()
-    else:
-        h1_tag = soup.find('h1')
-        if h1_tag:
-            metadata['title'] = h1_tag.get_text().strip()
-    
-    # Extract description
-    desc_tag = soup.find('meta', attrs={'name': 'description'})
-    if desc_tag:
-        metadata['description'] = desc_tag.get('content', '')
-    else:
-        # Fallback: first paragraph
-        p_tag = soup.find('p')
-        if p_tag:
-            metadata['description'] = p_tag.get_text()[:160]  # First 160 chars
-    
-    # Extract keywords
-    keywords_tag = soup.find('meta', attrs={'name': 'keywords'})
-    if keywords_tag:
-        keywords_str = keywords_tag.get('content', '')
-        metadata['keywords'] = [kw.strip() for kw in keywords_str.split(',') if kw.strip()]
-    
-    # Extract author
-    author_tag = soup.find('meta', attrs={'name': 'author'})
-    if not author_tag:
-        author_tag = soup.find('meta', attrs={'property': 'author'})
-    if author_tag:
-        metadata['author'] = author_tag.get('content', '')
-    
-    # Extract published date
-    date_tag = soup.find('meta', attrs={'name': 'date'})
-    if not date_tag:
-        date_tag = soup.find('meta', attrs={'property': 'article:published_time'})
-    if date_tag:
-        metadata['published_date'] = date_tag.get('content', '')
-    
-    return metadata
\ No newline at end of file
+    return HtmlDocument(html_content).metadata(url)
@@ -3,10 +3,19 @@ import sys
 from typing import Optional
 
 
+# Handler installed on the root logger by the first setup_logging call
+_handler: Optional[logging.Handler] = None
+
+
 def setup_logging(level: Optional[str] = "INFO") -> logging.Logger:
     """
-    Set up logging configuration for the application and return a logger instance
+    Set up logging configuration for the application and return a logger instance;
+    the handler is installed only once, so repeated calls don't duplicate log lines
     """
+    global _handler
+    if _handler is not None:
+        return logging.getLogger("rag_backend")
+
     # Determine the logging level
     log_level = getattr(logging, level.upper()) if level else logging.INFO
 
@@ -24,6 +33,7 @@ def setup_logging(level: Optional[str] = "INFO") -> logging.Logger:
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
     root_logger.addHandler(handler)
+    _handler = handler
 
     # Set specific loggers to WARNING level to reduce verbosity
     logging.getLogger("urllib3").setLevel(logging.WARNING)
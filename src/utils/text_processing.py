@@ -1,5 +1,137 @@
 import re
-from typing import List, Optional
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# Words/numbers, or any single other non-space character
+_TOKEN_RE = re.compile(r'\w+|\S')
+# Sentence endings followed by whitespace
+_SENT_SPLIT_RE = re.compile(r'[.!?]+\s+')
+
+# Shorter strings are faster through the regex than through a native call
+_NATIVE_MIN_LENGTH = 32
+_NATIVE_SPLIT_MIN_LENGTH = 256
+
+# Token class of each ASCII byte under _TOKEN_RE: 0 whitespace, 1 word, 2 other
+_ASCII_CLASSES = np.array(
+    [
+        0 if re.fullmatch(r'\s', chr(byte)) else 1 if re.fullmatch(r'\w', chr(byte)) else 2
+        for byte in range(128)
+    ],
+    dtype=np.uint8
+)
+# Code points above ASCII that \s matches (the same set as str.isspace)
+_UNICODE_SPACES = np.array(
+    [code for code in range(128, 0x10000) if chr(code).isspace()],
+    dtype=np.uint32
+)
+
+# Native kernels, compiled at import when numba is installed
+_count_ascii_tokens = None
+_sentence_bounds = None
+_count_ascii_segments = None
+if numba is not None:
+    @numba.njit(
+        numba.int64(numba.types.Array(numba.uint8, 1, 'C', readonly=True)),
+        cache=True
+    )
+    def _count_ascii_tokens(buf):
+        """
+        Count _TOKEN_RE matches in ASCII bytes: one per run of word bytes,
+        plus one per other non-whitespace byte
+        """
+        count = 0
+        in_word = False
+        for byte in buf:
+            byte_class = _ASCII_CLASSES[byte]
+            if byte_class == 1:
+                if not in_word:
+                    count += 1
+                    in_word = True
+            else:
+                in_word = False
+                if byte_class == 2:
+                    count += 1
+        return count
+
+    @numba.njit(cache=True)
+    def _is_space(code):
+        """
+        Whether a character code matches \\s
+        """
+        if code < 128:
+            return _ASCII_CLASSES[code] == 0
+        for space in _UNICODE_SPACES:
+            if code == space:
+                return True
+        return False
+
+    @numba.njit(
+        [
+            numba.int64(
+                numba.types.Array(numba.uint8, 1, 'C', readonly=True),
+                numba.types.Array(numba.int64, 1, 'C')
+            ),
+            numba.int64(
+                numba.types.Array(numba.uint32, 1, 'C', readonly=True),
+                numba.types.Array(numba.int64, 1, 'C')
+            )
+        ],
+        cache=True
+    )
+    def _sentence_bounds(buf, bounds):
+        """
+        Write the (start, end) offsets of the text between _SENT_SPLIT_RE
+        matches into bounds, returning the number of offsets. buf holds
+        ASCII bytes or UTF-32 code points, so offsets index the str directly
+        """
+        size = len(buf)
+        count = 0
+        start = 0
+        i = 0
+        while i < size:
+            byte = buf[i]
+            if byte == 46 or byte == 33 or byte == 63:  # . ! ?
+                end = i
+                while i < size and (buf[i] == 46 or buf[i] == 33 or buf[i] == 63):
+                    i += 1
+                # Only a terminator run followed by whitespace ends a sentence
+                if i < size and _is_space(buf[i]):
+                    while i < size and _is_space(buf[i]):
+                        i += 1
+                    bounds[count] = start
+                    bounds[count + 1] = end
+                    count += 2
+                    start = i
+            else:
+                i += 1
+        bounds[count] = start
+        bounds[count + 1] = size
+        return count + 2
+
+    @numba.njit(
+        numba.int64[::1](
+            numba.types.Array(numba.uint8, 1, 'C', readonly=True),
+            numba.types.Array(numba.int64, 1, 'C', readonly=True)
+        ),
+        cache=True
+    )
+    def _count_ascii_segments(buf, offsets):
+        """
+        Count tokens in each (start, end) segment of ASCII bytes written by
+        _sentence_bounds, as count_tokens would on each segment's text
+        """
+        counts = np.empty(len(offsets) // 2, dtype=np.int64)
+        for k in range(len(counts)):
+            counts[k] = _count_ascii_tokens(buf[offsets[2 * k]:offsets[2 * k + 1]])
+        return counts
 
 
 def count_tokens(text: str) -> int:
@@ -11,21 +143,102 @@ def count_tokens(text: str) -> int:
     if not text:
         return 0
         
+    # Long ASCII text is counted by the compiled byte scanner when numba is available
+    if _count_ascii_tokens is not None and len(text) >= _NATIVE_MIN_LENGTH and text.isascii():
+        return _count_ascii_tokens(_ascii_bytes(text))
+    
     # This is a simplified tokenization approach
     # Split on whitespace and punctuation, keeping the delimiters
-    tokens = re.findall(r'\w+|\S', text)
+    tokens = _TOKEN_RE.findall(text)
     return len(tokens)
 
 
+# Words recur heavily in natural text, so per-word counts are memoized.
+# Only the per-word loops use this: whole sentences rarely repeat and
+# would fill the cache with long strings
+_count_word_tokens = lru_cache(maxsize=1 << 16)(count_tokens)
+
+
+def _ascii_bytes(text: str) -> np.ndarray:
+    """
+    View ASCII text as a read-only uint8 array for the native kernels.
+    """
+    return np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+
+
+def _code_points(text: str) -> np.ndarray:
+    """
+    View text as a read-only array of one uint32 code point per character.
+    """
+    # surrogatepass keeps lone surrogates as single code points
+    return np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+
+
+def _sentence_offsets(buf: np.ndarray) -> np.ndarray:
+    """
+    Return the flat (start, end) offsets of the sentences in a character array.
+    """
+    # Every boundary consumes at least two characters, so this always has room
+    bounds = np.empty(len(buf) + 2, dtype=np.int64)
+    offsets = bounds[:_sentence_bounds(buf, bounds)]
+    offsets.flags.writeable = False
+    return offsets
+
+
+def iter_sentences(text: str) -> Iterator[str]:
+    """
+    Yield the sentences of text one at a time, stripped and non-empty.
+    """
+    # Long text is scanned by the compiled splitter when numba is available:
+    # ASCII as bytes, anything else as UTF-32 code points
+    if _sentence_bounds is not None and len(text) >= _NATIVE_SPLIT_MIN_LENGTH:
+        buf = _ascii_bytes(text) if text.isascii() else _code_points(text)
+        offsets = _sentence_offsets(buf).tolist()
+        for start, end in zip(offsets[::2], offsets[1::2]):
+            sentence = text[start:end].strip()
+            if sentence:
+                yield sentence
+        return
+    
+    # Sentences are the spans between sentence endings followed by whitespace
+    last = 0
+    for match in _SENT_SPLIT_RE.finditer(text):
+        sentence = text[last:match.start()].strip()
+        if sentence:
+            yield sentence
+        last = match.end()
+    sentence = text[last:].strip()
+    if sentence:
+        yield sentence
+
+
 def split_by_sentences(text: str) -> List[str]:
     """
     Split text into sentences using common sentence endings.
     """
-    # Split by sentence endings followed by whitespace
-    sentences = re.split(r'[.!?]+\s+', text)
-    # Remove empty strings and strip whitespace
-    sentences = [s.strip() for s in sentences if s.strip()]
-    return sentences
+    return list(iter_sentences(text))
+
+
+def iter_sentences_with_tokens(text: str) -> Iterator[Tuple[str, int]]:
+    """
+    Yield the sentences of text paired with their token counts.
+    """
+    # Long ASCII text is split and counted in a single native pass instead
+    # of one count_tokens call per sentence
+    if _count_ascii_segments is not None and len(text) >= _NATIVE_SPLIT_MIN_LENGTH and text.isascii():
+        buf = _ascii_bytes(text)
+        offsets = _sentence_offsets(buf)
+        counts = _count_ascii_segments(buf, offsets).tolist()
+        offsets = offsets.tolist()
+        # Stripping only removes whitespace, which holds no tokens
+        for start, end, tokens in zip(offsets[::2], offsets[1::2], counts):
+            sentence = text[start:end].strip()
+            if sentence:
+                yield sentence, tokens
+        return
+    
+    for sentence in iter_sentences(text):
+        yield sentence, count_tokens(sentence)
 
 
 def truncate_text(text: str, max_tokens: int) -> str:
@@ -36,27 +249,28 @@ def truncate_text(text: str, max_tokens: int) -> str:
         return ""
     
     # First try to preserve sentences
-    sentences = split_by_sentences(text)
+    sentences = iter_sentences_with_tokens(text)
     result = []
     current_tokens = 0
     
-    for sentence in sentences:
-        sentence_tokens = count_tokens(sentence)
-        
+    for sentence, sentence_tokens in sentences:
         if current_tokens + sentence_tokens <= max_tokens:
             result.append(sentence)
             current_tokens += sentence_tokens
         else:
             # If the sentence is too long, truncate it by words
             if current_tokens == 0:  # If this is the first sentence
-                words = sentence.split()
-                truncated_sentence = ""
-                for word in words:
-                    if count_tokens(truncated_sentence + " " + word) <= max_tokens:
-                        truncated_sentence += " " + word
-                    else:
+                # Tokens never span whitespace, so each word is counted once
+                # and the running total tracks the truncated sentence
+                kept_words = []
+                running_tokens = 0
+                for word in sentence.split():
+                    word_tokens = _count_word_tokens(word)
+                    if running_tokens + word_tokens > max_tokens:
                         break
-                result.append(truncated_sentence.strip())
+                    kept_words.append(word)
+                    running_tokens += word_tokens
+                result.append(" ".join(kept_words))
                 break
             else:
                 break
@@ -71,102 +285,66 @@ def split_text_by_size(text: str, chunk_size: int, overlap: int = 0) -> List[str
     if not text:
         return []
     
-    sentences = split_by_sentences(text)
-    chunks = []
-    current_chunk = ""
+    # Each sentence is tokenized once, and chunk token counts are kept alongside
+    # the chunks so the overlap pass doesn't re-split or re-count them
+    sentences = iter_sentences_with_tokens(text)
+    chunks: List[str] = []
+    chunk_tokens: List[int] = []
+    current_parts: List[str] = []
     current_tokens = 0
     
-    for sentence in sentences:
-        sentence_tokens = count_tokens(sentence)
-        
+    for sentence, sentence_tokens in sentences:
         # If adding the sentence would exceed chunk size
         if current_tokens + sentence_tokens > chunk_size:
+            # Add the current chunk to results
+            if current_parts:
+                chunks.append(" ".join(current_parts))
+                chunk_tokens.append(current_tokens)
+            
             # If the sentence is too long by itself, split it
             if sentence_tokens > chunk_size:
-                # Add the current chunk if not empty
-                if current_chunk.strip():
-                    chunks.append(current_chunk.strip())
-                
-                # Split the long sentence into smaller parts
-                words = sentence.split()
-                temp_chunk = ""
+                # Split the long sentence into smaller parts, collecting words
+                # and joining them once per part
+                temp_words = []
                 temp_tokens = 0
                 
-                for word in words:
-                    word_tokens = count_tokens(word)
+                for word in sentence.split():
+                    word_tokens = _count_word_tokens(word)
                     
                     if temp_tokens + word_tokens > chunk_size:
-                        if temp_chunk.strip():
-                            chunks.append(temp_chunk.strip())
-                        temp_chunk = word
+                        if temp_words:
+                            chunks.append(" ".join(temp_words))
+                            chunk_tokens.append(temp_tokens)
+                        temp_words = [word]
                         temp_tokens = word_tokens
                     else:
-                        if temp_chunk:
-                            temp_chunk += " " + word
-                        else:
-                            temp_chunk = word
+                        temp_words.append(word)
                         temp_tokens += word_tokens
                 
-                # Add the final temp chunk
-                if temp_chunk.strip():
-                    current_chunk = temp_chunk
-                    current_tokens = temp_tokens
-                else:
-                    current_chunk = ""
-                    current_tokens = 0
+                # The final part starts the next chunk
+                current_parts = [" ".join(temp_words)] if temp_words else []
+                current_tokens = temp_tokens if temp_words else 0
             else:
-                # Add the current chunk to results
-                if current_chunk.strip():
-                    chunks.append(current_chunk.strip())
-                
                 # Start a new chunk with the current sentence
-                current_chunk = sentence
+                current_parts = [sentence]
                 current_tokens = sentence_tokens
         else:
             # Add sentence to current chunk
-            if current_chunk:
-                current_chunk += " " + sentence
-            else:
-                current_chunk = sentence
+            current_parts.append(sentence)
             current_tokens += sentence_tokens
     
     # Add the last chunk
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
+    if current_parts:
+        chunks.append(" ".join(current_parts))
+        chunk_tokens.append(current_tokens)
     
-    # Apply overlap if specified
+    # Apply overlap if specified. Chunks are sentences joined by single spaces,
+    # so they hold no sentence boundary of their own: a chunk is carried over
+    # into the next one whole when it fits within the overlap, and not at all otherwise
     if overlap > 0:
-        chunks_with_overlap = []
-        for i, chunk in enumerate(chunks):
-            if i == len(chunks) - 1:  # Last chunk, no overlap needed
-                chunks_with_overlap.append(chunk)
-            else:
-                # Find the last N tokens of the current chunk
-                sentences = split_by_sentences(chunk)
-                overlap_chunk = ""
-                overlap_tokens = 0
-                
-                # Add sentences in reverse order until we reach overlap token count
-                for sentence in reversed(sentences):
-                    sentence_tokens = count_tokens(sentence)
-                    if overlap_tokens + sentence_tokens <= overlap:
-                        if overlap_chunk:
-                            overlap_chunk = sentence + " " + overlap_chunk
-                        else:
-                            overlap_chunk = sentence
-                        overlap_tokens += sentence_tokens
-                    else:
-                        break
-                
-                # Add overlap to the next chunk
-                if overlap_chunk.strip():
-                    next_chunk_with_overlap = overlap_chunk + " " + chunks[i + 1]
-                    chunks_with_overlap.append(chunk)
-                    # Update next chunk with overlap content
-                    chunks[i+1] = next_chunk_with_overlap
-                else:
-                    chunks_with_overlap.append(chunk)
-        
-        return chunks_with_overlap
-    else:
-        return chunks
\ No newline at end of file
+        for i in range(len(chunks) - 1):
+            if chunk_tokens[i] <= overlap:
+                chunks[i + 1] = chunks[i] + " " + chunks[i + 1]
+                chunk_tokens[i + 1] += chunk_tokens[i]
+    
+    return chunks
@@ -1,12 +1,43 @@
 import re
 from urllib.parse import urlparse
-from typing import List, Optional
+from typing import List, Optional, Tuple
+
+
+def _split_http_url(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Return (scheme, netloc) for plain http(s) URLs without calling urlparse,
+    or None when the URL needs the full parser
+    """
+    if url.startswith('https://'):
+        scheme, start = 'https', 8
+    elif url.startswith('http://'):
+        scheme, start = 'http', 7
+    else:
+        return None
+    
+    # The netloc runs up to the first path, query or fragment delimiter
+    end = len(url)
+    for delimiter in '/?#':
+        index = url.find(delimiter, start, end)
+        if index != -1:
+            end = index
+    netloc = url[start:end]
+    
+    # urlparse strips tabs and newlines, validates IPv6 brackets and
+    # normalizes non-ASCII hosts, so those URLs take the slow path
+    if not (netloc.isascii() and netloc.isprintable()) or '[' in netloc or ']' in netloc:
+        return None
+    return scheme, netloc
 
 
 def is_valid_url(url: str) -> bool:
     """
     Validate if a string is a properly formatted URL
     """
+    parts = _split_http_url(url)
+    if parts is not None:
+        return bool(parts[1])
+    
     try:
         result = urlparse(url)
         return all([result.scheme, result.netloc])
@@ -19,7 +50,7 @@ def normalize_url(url: str) -> str:
     Normalize URL by removing fragments and ensuring proper format
     """
     # Remove fragment
-    url = url.split('#')[0]
+    url = url.partition('#')[0]
     
     # Ensure proper scheme
     if not url.startswith(('http://', 'https://')):
@@ -35,6 +66,10 @@ def extract_domain(url: str) -> Optional[str]:
     """
     Extract domain from URL
     """
+    parts = _split_http_url(url)
+    if parts is not None:
+        return parts[1]
+    
     try:
         result = urlparse(url)
         return result.netloc
@@ -46,6 +81,10 @@ def get_base_url(url: str) -> str:
     """
     Get base URL (scheme + domain) from full URL
     """
+    parts = _split_http_url(url)
+    if parts is not None:
+        return f"{parts[0]}://{parts[1]}"
+    
     try:
         result = urlparse(url)
         return f"{result.scheme}://{result.netloc}"
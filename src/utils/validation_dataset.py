@@ -52,18 +52,20 @@ TEST_CASES = [
 ]
 
 
+# Lookups by query; built in reverse so the first case wins for a repeated query
+_TEST_CASES_BY_QUERY = {test_case["query"]: test_case for test_case in reversed(TEST_CASES)}
+_ALL_TEST_QUERIES = tuple(test_case["query"] for test_case in TEST_CASES)
+
+
 def get_test_case_by_query(query: str) -> Dict[str, Any]:
     """
     Retrieve a test case by its query string
     """
-    for test_case in TEST_CASES:
-        if test_case["query"] == query:
-            return test_case
-    return None
+    return _TEST_CASES_BY_QUERY.get(query)
 
 
 def get_all_test_queries() -> List[str]:
     """
     Get all test query strings
     """
-    return [test_case["query"] for test_case in TEST_CASES]
\ No newline at end of file
+    return list(_ALL_TEST_QUERIES)
\ No newline at end of file
@@ -1,9 +1,102 @@
 # Test configuration and fixtures
+import asyncio
+import httpx
 import pytest
+from fastapi.testclient import TestClient
+from datetime import datetime
 from src.main import app
-from httpx import AsyncClient
+from src.chat.models import AIResponse
+from src.chat.services import get_chat_service
+from src.rag.services import get_rag_service
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    return AsyncClient(app=app, base_url="http://testserver")
\ No newline at end of file
+    # One app startup/shutdown shared by every test that uses the client
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def async_client():
+    # Async tests call the app in-process on their own event loop, without
+    # TestClient's thread portal. ASGITransport binds nothing to a loop, so
+    # one client serves every test
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
+    yield client
+    asyncio.run(client.aclose())
+
+
+@pytest.fixture(scope="session")
+def canned_ai_response():
+    # Validated once per session; tests only hand it to the chat service stub
+    return AIResponse(
+        id="test_response_id",
+        content="Test AI response based on textbook content",
+        query_id="test_query_id",
+        retrieved_context_ids=[],
+        timestamp=datetime(2023, 10, 1, 12, 0, 0),
+        confidence_score=0.85,
+        source_documents=[]
+    )
+
+
+class StubRAGService:
+    """
+    Stands in for RAGService behind get_rag_service; tests set the canned results
+    """
+    def __init__(self):
+        self.validation = (True, 0.0, [])
+        self.contexts = []
+        self.answer = ""
+
+    async def validate_query(self, query, selected_text=None):
+        return self.validation
+
+    async def retrieve_context(self, query, selected_text=None):
+        return self.contexts
+
+    async def generate_response(self, query, contexts, temperature=0.7):
+        return self.answer
+
+
+class StubChatService:
+    """
+    Stands in for ChatService behind get_chat_service; tests set the canned response
+    """
+    def __init__(self):
+        self.response = None
+
+    async def process_query(self, user_query, rag_service, temperature=0.7, session_id=None):
+        return self.response
+
+
+@pytest.fixture(scope="module")
+def stub_services():
+    # The chat endpoints get one stub of each service per test module through
+    # dependency overrides, so no mock machinery runs in the request path
+    chat_service = StubChatService()
+    rag_service = StubRAGService()
+    app.dependency_overrides[get_chat_service] = lambda: chat_service
+    app.dependency_overrides[get_rag_service] = lambda: rag_service
+    yield chat_service, rag_service
+    app.dependency_overrides.pop(get_chat_service, None)
+    app.dependency_overrides.pop(get_rag_service, None)
+
+
+@pytest.fixture
+def stub_rag_service():
+    # Only retrieval and generation are stubbed, so the real ChatService and
+    # the app's shared session store handle the request. Overrides left by a
+    # module's stub_services are suspended for the test and restored after
+    rag_service = StubRAGService()
+    overrides = app.dependency_overrides
+    suspended = {
+        dependency: overrides.pop(dependency)
+        for dependency in (get_chat_service, get_rag_service)
+        if dependency in overrides
+    }
+    overrides[get_rag_service] = lambda: rag_service
+    yield rag_service
+    overrides.pop(get_rag_service, None)
+    overrides.update(suspended)
@@ -1,6 +1,8 @@
 import pytest
 from src.services.chunking_service import ChunkingService
-from src.utils.text_processing import split_text_by_size
+from src.utils.text_processing import (
+    split_text_by_size, split_by_sentences, iter_sentences_with_tokens, count_tokens
+)
 
 
 def test_chunk_content_basic():
@@ -154,4 +156,54 @@ def test_chunk_metadata():
         assert metadata['chunk_index'] == i
         assert metadata['total_chunks'] == len(chunks)
         assert metadata['original_content_length'] == len(content)
-        assert metadata['chunk_length'] == len(chunk['content'])
\ No newline at end of file
+        assert metadata['chunk_length'] == len(chunk['content'])
+
+def test_iter_chunks_matches_chunk_content():
+    """Test that the streaming interface yields the same chunks lazily"""
+    chunking_service = ChunkingService()
+    
+    content = "This is a sample content for testing. " * 50
+    url = "https://example.com/test"
+    
+    chunk_iter = chunking_service.iter_chunks(content, url, chunk_size=50)
+    
+    assert not isinstance(chunk_iter, list)
+    streamed = list(chunk_iter)
+    chunks = chunking_service.chunk_content(content, url, chunk_size=50)
+    
+    assert [c['content'] for c in streamed] == [c['content'] for c in chunks]
+    assert [c['metadata'] for c in streamed] == [c['metadata'] for c in chunks]
+
+
+def test_count_tokens_long_and_short_text():
+    """Test that token counts agree for short, long ASCII and non-ASCII text"""
+    sentence = "The robot's node publishes /cmd_vel at 10 Hz, e.g. for teleop. "
+    
+    assert count_tokens("") == 0
+    assert count_tokens("node_1") == 1
+    assert count_tokens(sentence) == 19
+    assert count_tokens(sentence * 100) == 1900
+    assert count_tokens("Über naïve robots — fast") == 5
+
+
+def test_split_by_sentences_long_and_short_text():
+    """Test that sentence splitting agrees for short and long ASCII text"""
+    text = "Pi is 3.14 in ROS 2. Nodes talk over topics!? Yes... "
+    
+    assert split_by_sentences(text) == ["Pi is 3.14 in ROS 2", "Nodes talk over topics", "Yes"]
+    assert split_by_sentences(text * 10) == ["Pi is 3.14 in ROS 2", "Nodes talk over topics", "Yes"] * 10
+    assert split_by_sentences((text * 10).rstrip())[-1] == "Yes..."
+    
+    # Non-ASCII text, including Unicode whitespace after a sentence ending
+    unicode_text = "Le robot’s naïve — ok.\u00a0Ça marche!\u3000Oui. " * 10
+    assert split_by_sentences(unicode_text) == ["Le robot’s naïve — ok", "Ça marche", "Oui"] * 10
+
+
+def test_iter_sentences_with_tokens_matches_count_tokens():
+    """Test that paired token counts match count_tokens for short and long text"""
+    text = "Pi is 3.14 in ROS 2. Nodes (e.g. talkers) publish!  "
+    
+    for sample in (text, text * 20):
+        pairs = list(iter_sentences_with_tokens(sample))
+        assert [sentence for sentence, _ in pairs] == split_by_sentences(sample)
+        assert [tokens for _, tokens in pairs] == [count_tokens(s) for s, _ in pairs]
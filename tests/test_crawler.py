@@ -1,7 +1,9 @@
 import pytest
 from fastapi.testclient import TestClient
 from src.main import app
-from src.services.crawler_service import CrawlerService
+from src.services.crawler_service import CrawlerService, close_crawlers
+from src.utils.content_processing import HtmlDocument
+from src.utils.url_validator import is_valid_url, normalize_url, extract_domain, get_base_url
 
 
 client = TestClient(app)
@@ -102,4 +104,51 @@ def test_store_vectors_in_qdrant():
         json={"chunks_with_embeddings": test_chunks}
     )
     # This might fail if Qdrant isn't configured, but we can test the structure
-    assert response.status_code in [200, 400, 500]
\ No newline at end of file
+    assert response.status_code in [200, 400, 500]
+
+
+def test_html_document_extracts_from_single_parse():
+    """Test that one parsed document serves text, main content and metadata"""
+    document = HtmlDocument(
+        "<html><head><title> Intro </title><script>var x = 1;</script>"
+        "<meta name='keywords' content='ros, robots'></head>"
+        "<body><nav>Menu</nav>\n<main><nav>Sidebar</nav>\n<p>Hello\n   world</p></main></body></html>"
+    )
+
+    assert document.main_content() == "Hello world"
+    # Main content extraction leaves the shared tree intact
+    assert document.text() == "Intro Menu Sidebar Hello world"
+
+    metadata = document.metadata("https://example.com/intro")
+    assert metadata["title"] == "Intro"
+    assert metadata["keywords"] == ["ros", "robots"]
+
+
+def test_url_helpers_match_urlparse():
+    """Test URL helpers on fast-path and urlparse-fallback URLs"""
+    assert is_valid_url("https://docs.example.com/module-1?x=1#top")
+    assert not is_valid_url("https:///module-1")
+    assert not is_valid_url("not a url")
+    assert extract_domain("http://user@example.com:8080?q=1") == "user@example.com:8080"
+    assert extract_domain("https://[::1") is None
+    assert get_base_url("HTTPS://Example.com/path") == "https://Example.com"
+    assert get_base_url("https://docs.example.com#intro") == "https://docs.example.com"
+    assert normalize_url("docs.example.com/module-1/#intro#more") == "https://docs.example.com/module-1"
+
+
+async def test_crawler_pool_opens_on_first_fetch_and_closes_on_shutdown():
+    """Test that crawlers hold no connection pool until used and close_crawlers closes it"""
+    idle_crawler = CrawlerService()
+    crawler = CrawlerService()
+    assert idle_crawler._client is None
+
+    http_client = crawler.client
+    assert crawler.client is http_client
+    assert crawler in CrawlerService._open_crawlers
+    assert idle_crawler not in CrawlerService._open_crawlers
+
+    await close_crawlers()
+
+    assert http_client.is_closed
+    assert crawler._client is None
+    assert crawler not in CrawlerService._open_crawlers
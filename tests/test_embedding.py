@@ -1,6 +1,8 @@
 import pytest
-from src.services.embedding_service import CohereClient
-from unittest.mock import patch, MagicMock
+import asyncio
+import cohere
+from src.services.embedding_service import CohereClient, BatchingEmbedder
+from unittest.mock import patch, MagicMock, AsyncMock
 
 
 def test_validate_embeddings():
@@ -94,6 +96,95 @@ def test_generate_multiple_embeddings_structure(mock_cohere_client):
         mock_client_instance.embed.assert_called_once()
 
 
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_async_batches_in_order():
+    """Test that concurrent batches are reassembled in input order"""
+    cohere_client = CohereClient()
+    cohere_client.batch_size = 2
+    
+    async def fake_embed(texts, model, input_type):
+        response = MagicMock()
+        response.embeddings = [[float(text.split()[-1])] for text in texts]
+        return response
+    
+    with patch.object(cohere_client, 'async_client') as mock_async_client:
+        mock_async_client.embed = AsyncMock(side_effect=fake_embed)
+        
+        texts = [f"Test text {i}" for i in range(5)]
+        result = await cohere_client.generate_embeddings_async(texts)
+        
+        assert result == [[0.0], [1.0], [2.0], [3.0], [4.0]]
+        assert mock_async_client.embed.await_count == 3
+
+
+def test_pack_batches_respects_text_and_char_limits():
+    """Test that batches close at batch_size texts or the character budget"""
+    cohere_client = CohereClient()
+    cohere_client.batch_size = 3
+    cohere_client.max_batch_chars = 10
+    
+    texts = ["aaaa", "bbbb", "ccc", "d", "e", "f", "gggggggggggg"]
+    batches = cohere_client._pack_batches(texts)
+    
+    assert batches == [["aaaa", "bbbb"], ["ccc", "d", "e"], ["f"], ["gggggggggggg"]]
+
+
+@pytest.mark.asyncio
+async def test_batching_embedder_coalesces_concurrent_queries():
+    """Test that concurrent single-text requests share one embedding call"""
+    cohere_client = CohereClient()
+    
+    async def fake_embed(texts, max_retries=3):
+        return [[float(len(text))] for text in texts]
+    
+    with patch.object(cohere_client, 'generate_embeddings_with_retry', side_effect=fake_embed) as mock_embed:
+        batcher = BatchingEmbedder(cohere_client)
+        
+        results = await asyncio.gather(*(batcher.embed("x" * n) for n in range(1, 4)))
+        
+        assert results == [[1.0], [2.0], [3.0]]
+        mock_embed.assert_called_once_with(["x", "xx", "xxx"])
+        await batcher.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batching_embedder_aclose_cancels_worker():
+    """Test that closing the embedder stops its background worker"""
+    cohere_client = CohereClient()
+    
+    async def fake_embed(texts, max_retries=3):
+        return [[1.0] for _ in texts]
+    
+    with patch.object(cohere_client, 'generate_embeddings_with_retry', side_effect=fake_embed):
+        batcher = BatchingEmbedder(cohere_client)
+        assert await batcher.embed("x") == [1.0]
+        worker = batcher._worker
+        
+        await batcher.aclose()
+        
+        assert worker.cancelled()
+        assert batcher._worker is None
+        
+        # The embedder is usable again after closing
+        assert await batcher.embed("y") == [1.0]
+        await batcher.aclose()
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_with_retry_skips_non_retryable_errors():
+    """Test that permanent client errors are raised without retrying"""
+    cohere_client = CohereClient()
+    
+    with patch.object(cohere_client, 'async_client') as mock_async_client:
+        mock_async_client.embed = AsyncMock(side_effect=cohere.errors.BadRequestError(body="bad request"))
+        
+        with pytest.raises(Exception) as exc_info:
+            await cohere_client.generate_embeddings_with_retry(["Test text"])
+        
+        assert "Failed to generate embeddings" in str(exc_info.value)
+        assert mock_async_client.embed.await_count == 1
+
 def test_generate_embeddings_empty_input():
     """Test handling of empty input"""
     cohere_client = CohereClient()
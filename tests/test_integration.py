@@ -1,11 +1,15 @@
+import asyncio
+import numpy as np
 import pytest
+from contextlib import asynccontextmanager
 from fastapi.testclient import TestClient
 from src.main import app
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from src.services.crawler_service import CrawlerService
 from src.services.chunking_service import ChunkingService
 from src.services.embedding_service import CohereClient
 from src.services.storage_service import QdrantService
+from src.services.pipeline_service import PipelineService
 
 
 client = TestClient(app)
@@ -134,7 +138,7 @@ def test_chunks_process_endpoint_integration():
 def test_embeddings_generate_endpoint_integration():
     """Integration test for the embeddings generation endpoint"""
     
-    with patch.object(CohereClient, 'generate_embeddings') as mock_embed:
+    with patch.object(CohereClient, 'generate_embeddings_async') as mock_embed:
         mock_embed.return_value = [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
         
         test_contents = ["Content 1", "Content 2"]
@@ -151,7 +155,7 @@ def test_embeddings_generate_endpoint_integration():
 def test_vectors_store_endpoint_integration():
     """Integration test for the vector storage endpoint"""
     
-    with patch.object(QdrantService, 'store_chunks') as mock_store:
+    with patch.object(QdrantService, 'async_store_chunks') as mock_store:
         mock_store.return_value = True
         
         test_chunks = [
@@ -316,4 +320,121 @@ def test_pipeline_test_endpoint_integration():
         assert "test_results" in data
         assert "validation_passed" in data
         assert "total_tests" in data
-        assert "average_confidence" in data
\ No newline at end of file
+        assert "average_confidence" in data
+
+@pytest.mark.asyncio
+async def test_execute_pipeline_embeds_concurrently_and_accounts_errors():
+    """Test the staged pipeline's counts, stored points and error accounting"""
+    urls = [f"https://example.com/docs/page-{i}" for i in range(7)]
+    
+    async def fake_crawl(url):
+        if url.endswith("page-5"):
+            raise Exception("connection reset")
+        if url.endswith("page-6"):
+            return None
+        return {
+            "url": url,
+            "content": f"Test content for {url.rsplit('/', 1)[1]} of the pipeline.",
+            "metadata": {"title": "Docs"}
+        }
+    
+    in_flight = 0
+    max_in_flight = 0
+    
+    async def fake_embed(texts, max_retries=3):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if any("page-2" in text for text in texts):
+                raise Exception("embedding API error")
+            return [[float(len(text)), 1.0, 0.0] for text in texts]
+        finally:
+            in_flight -= 1
+    
+    @asynccontextmanager
+    async def bulk_ingest():
+        yield
+    
+    storage = MagicMock()
+    storage.upsert_batch_size = 3
+    storage.async_bulk_ingest = bulk_ingest
+    storage.async_store_batch = AsyncMock(return_value=True)
+    
+    with patch('src.services.pipeline_service.get_qdrant_service', return_value=storage):
+        service = PipelineService()
+    service.crawler_service.crawl_single_page = fake_crawl
+    service.embedding_service.generate_embeddings_with_retry = fake_embed
+    service.embedding_service.batch_size = 1  # One embed call per page
+    
+    result = await service.execute_pipeline(urls)
+    
+    assert "pipeline_error" not in result
+    assert result["crawling"]["processed"] == 5
+    assert result["crawling"]["failed"] == 2
+    assert result["chunking"]["processed"] == 5
+    assert result["embedding"]["processed"] == 4
+    assert result["embedding"]["failed"] == 1
+    assert result["embedding"]["details"][0]["error"] == "embedding API error"
+    assert result["storage"]["stored"] == 4
+    assert result["storage"]["skipped"] == 1
+    
+    # Embed calls overlap instead of running one at a time
+    assert max_in_flight > 1
+    
+    # Every stored point carries its own id in its payload, next to its vector
+    stored_ids = []
+    stored_urls = []
+    for call in storage.async_store_batch.await_args_list:
+        ids, vectors, payloads = call.args
+        assert vectors.shape == (len(ids), 3)
+        assert [payload["id"] for payload in payloads] == ids
+        for payload, vector in zip(payloads, vectors):
+            assert vector[0] == len(payload["content"])
+        stored_ids.extend(ids)
+        stored_urls.extend(payload["source_url"] for payload in payloads)
+    assert len(set(stored_ids)) == 4
+    assert sorted(stored_urls) == [urls[i] for i in (0, 1, 3, 4)]
+
+
+@pytest.mark.asyncio
+async def test_execute_pipeline_rejects_malformed_embeddings():
+    """Test that non-numeric, non-finite and miscounted embeddings are never stored"""
+    with patch('src.services.pipeline_service.get_qdrant_service'):
+        service = PipelineService()
+    
+    # Strings are not coerced, and NaN/inf rows are dropped
+    vectors, rows = service._to_vector_block([[0.1, 0.2], ["0.3", "0.4"], [float("nan"), 0.5], [0.6, 0.7]])
+    assert rows == [0, 3]
+    assert vectors.dtype == np.float32 and vectors.shape == (2, 2)
+    vectors, rows = service._to_vector_block([[0.1, float("inf")], [0.2, 0.3]])
+    assert rows == [1]
+    
+    urls = [f"https://example.com/docs/page-{i}" for i in range(2)]
+    
+    async def fake_crawl(url):
+        return {"url": url, "content": f"Test content for {url} of the pipeline.", "metadata": {}}
+    
+    async def short_embed(texts, max_retries=3):
+        return [[0.1, 0.2, 0.3]] * (len(texts) - 1)
+    
+    @asynccontextmanager
+    async def bulk_ingest():
+        yield
+    
+    storage = MagicMock()
+    storage.upsert_batch_size = 10
+    storage.async_bulk_ingest = bulk_ingest
+    storage.async_store_batch = AsyncMock(return_value=True)
+    service.storage_service = storage
+    service.crawler_service.crawl_single_page = fake_crawl
+    service.embedding_service.generate_embeddings_with_retry = short_embed
+    
+    result = await service.execute_pipeline(urls)
+    
+    # A short response can't be paired with its chunks, so the whole batch fails
+    assert result["embedding"]["processed"] == 0
+    assert result["embedding"]["failed"] == 2
+    assert result["storage"]["skipped"] == 2
+    storage.async_store_batch.assert_not_awaited()
@@ -1,7 +1,8 @@
 import pytest
+from collections import OrderedDict
 from fastapi.testclient import TestClient
 from src.main import app
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from src.services.retrieval_service import RetrievalService
 
 
@@ -119,4 +120,38 @@ def test_query_endpoint_error_handling():
         # Verify the error response
         assert response.status_code == 500
         data = response.json()
-        assert "Query processing failed" in data["detail"]
\ No newline at end of file
+        assert "Query processing failed" in data["detail"]
+
+
+@pytest.mark.asyncio
+async def test_query_embeddings_are_cached():
+    """Test that repeated queries reuse the cached embedding"""
+    with patch('src.services.retrieval_service.get_qdrant_service'):
+        service = RetrievalService()
+        other_service = RetrievalService()
+    
+    with patch.object(RetrievalService, '_emb_cache', OrderedDict()), \
+         patch.object(service.query_embedder, 'embed', new=AsyncMock(return_value=[0.1, 0.2, 0.3])) as mock_embed:
+        # One query coalescer is shared by every instance of the service
+        assert service.query_embedder is other_service.query_embedder
+        
+        first = await service._embed_query("What is ROS 2?")
+        # The cache is shared by every instance of the service
+        second = await other_service._embed_query("What is ROS 2?")
+        
+        assert first == second == [0.1, 0.2, 0.3]
+        mock_embed.assert_awaited_once_with("What is ROS 2?")
+
+
+def test_expected_dimension_is_read_once_per_process():
+    """Test that the stored vector size is shared by per-request service instances"""
+    with patch('src.services.retrieval_service.get_qdrant_service') as mock_get_qdrant, \
+         patch.object(RetrievalService, '_expected_dims', {}):
+        storage_service = mock_get_qdrant.return_value
+        storage_service.collection_name = "textbook_chunks"
+        storage_service.client.get_collection.return_value.config.params.vectors.size = 3
+        
+        assert RetrievalService()._validate_embedding_compatibility([0.1, 0.2, 0.3]) is True
+        assert RetrievalService()._validate_embedding_compatibility([0.1, 0.2]) is False
+        
+        storage_service.client.get_collection.assert_called_once_with("textbook_chunks")
@@ -1,9 +1,10 @@
 import pytest
 from src.services.storage_service import QdrantService
 from src.models.content_chunk import ContentChunk
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from datetime import datetime
 from uuid import uuid4
+import numpy as np
 
 
 def test_store_chunk():
@@ -141,9 +142,131 @@ def test_store_chunks_with_duplicates():
         assert len(points) == 1  # Only the new chunk should be stored
 
 
+def test_store_chunks_skips_retrieve_for_known_ids():
+    """Test that chunks stored earlier are not looked up again"""
+    with patch('src.services.storage_service.QdrantClient') as mock_client, \
+         patch('src.services.storage_service.AsyncQdrantClient'):
+        mock_client_instance = MagicMock()
+        mock_client_instance.retrieve.return_value = []  # No existing chunks
+        mock_client.return_value = mock_client_instance
+        
+        # Initialize the service
+        service = QdrantService()
+        
+        chunk = ContentChunk(
+            id=uuid4(),
+            content="Test content",
+            source_url="https://example.com/test",
+            section="Test Section",
+            embedding=[0.1, 0.2, 0.3],
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+            metadata={"test": True}
+        )
+        
+        assert service.store_chunks([chunk]) is True
+        assert service.store_chunks([chunk]) is True
+        
+        # Only the first call needed to ask Qdrant and write the point
+        mock_client_instance.retrieve.assert_called_once()
+        mock_client_instance.upsert.assert_called_once()
+
+
+def test_store_chunk_after_delete_writes_again():
+    """Test that a deleted chunk is written again instead of being skipped as seen"""
+    with patch('src.services.storage_service.QdrantClient') as mock_client, \
+         patch('src.services.storage_service.AsyncQdrantClient'):
+        mock_client_instance = MagicMock()
+        mock_client_instance.retrieve.return_value = []  # No existing chunks
+        mock_client.return_value = mock_client_instance
+        
+        service = QdrantService()
+        
+        chunk = ContentChunk(
+            id=uuid4(),
+            content="Test content",
+            source_url="https://example.com/test",
+            section="Test Section",
+            embedding=[0.1, 0.2, 0.3],
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+            metadata={"test": True}
+        )
+        
+        assert service.store_chunk(chunk) is True
+        assert service.delete_chunk_by_id(str(chunk.id)) is True
+        assert service.store_chunks([chunk]) is True
+        
+        assert mock_client_instance.upsert.call_count == 2
+
+
+async def test_async_store_chunks():
+    """Test storing chunks through the async client"""
+    with patch('src.services.storage_service.QdrantClient'), \
+         patch('src.services.storage_service.AsyncQdrantClient') as mock_async_client:
+        mock_async_instance = MagicMock()
+        mock_async_instance.upsert = AsyncMock()
+        mock_async_client.return_value = mock_async_instance
+
+        # Initialize the service with small sub-batches
+        service = QdrantService()
+        service.upsert_batch_size = 2
+
+        chunks = [
+            ContentChunk(
+                id=uuid4(),
+                content=f"Test content {i}",
+                source_url=f"https://example.com/test{i}",
+                section="Test Section",
+                embedding=[0.1, 0.2, 0.3],
+                created_at=datetime.now(),
+                updated_at=datetime.now(),
+                metadata={"test": True}
+            )
+            for i in range(5)
+        ]
+
+        result = await service.async_store_chunks(chunks)
+
+        assert result is True
+        assert mock_async_instance.upsert.await_count == 3
+        mock_async_instance.retrieve.assert_not_called()
+        points = [
+            point
+            for call in mock_async_instance.upsert.call_args_list
+            for point in call[1]['points']
+        ]
+        assert [point.id for point in points] == [str(chunk.id) for chunk in chunks]
+
+
+async def test_async_store_batch():
+    """Test storing parallel id/vector/payload arrays as a single Qdrant batch"""
+    with patch('src.services.storage_service.QdrantClient'), \
+         patch('src.services.storage_service.AsyncQdrantClient') as mock_async_client:
+        mock_async_instance = MagicMock()
+        mock_async_instance.upsert = AsyncMock()
+        mock_async_client.return_value = mock_async_instance
+
+        # Initialize the service
+        service = QdrantService()
+
+        ids = [str(uuid4()), str(uuid4())]
+        vectors = np.array([[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]], dtype=np.float32)
+        payloads = [{"content": "Test content 1"}, {"content": "Test content 2"}]
+
+        result = await service.async_store_batch(ids, vectors, payloads)
+
+        assert result is True
+        batch = mock_async_instance.upsert.call_args[1]['points']
+        assert batch.ids == ids
+        assert len(batch.vectors) == 2
+        assert batch.payloads == payloads
+
+
 def test_search_similar():
     """Test searching for similar content"""
-    with patch('qdrant_client.QdrantClient') as mock_client:
+    with patch('src.services.storage_service.QdrantClient') as mock_client, \
+         patch('src.services.storage_service.AsyncQdrantClient'):
         # Mock the search response
         mock_search_result = [
             MagicMock(),
@@ -156,6 +279,7 @@ def test_search_similar():
             "section": "Similar Section 1",
             "score": 0.9
         }
+        mock_search_result[0].score = 0.9
         mock_search_result[1].id = str(uuid4())
         mock_search_result[1].payload = {
             "content": "Similar content 2",
@@ -163,9 +287,10 @@ def test_search_similar():
             "section": "Similar Section 2",
             "score": 0.8
         }
+        mock_search_result[1].score = 0.8
         
         mock_client_instance = MagicMock()
-        mock_client_instance.search.return_value = mock_search_result
+        mock_client_instance.query_points.return_value.points = mock_search_result
         mock_client.return_value = mock_client_instance
         
         # Initialize the service
@@ -183,6 +308,59 @@ def test_search_similar():
         assert results[1]["score"] == 0.8
 
 
+def test_search_similar_caches_results_until_next_write():
+    """Test that repeated searches are served from the cache until a write"""
+    with patch('src.services.storage_service.QdrantClient') as mock_client, \
+         patch('src.services.storage_service.AsyncQdrantClient'):
+        result = MagicMock()
+        result.id = str(uuid4())
+        result.score = 0.9
+        result.payload = {"content": "Cached content", "source_url": "https://example.com", "section": "Intro"}
+        
+        mock_client_instance = MagicMock()
+        mock_client_instance.query_points.return_value.points = [result]
+        mock_client.return_value = mock_client_instance
+        
+        service = QdrantService()
+        
+        first = service.search_similar([0.1, 0.2, 0.3], limit=5)
+        second = service.search_similar([0.1, 0.2, 0.3], limit=5)
+        assert first == second
+        assert mock_client_instance.query_points.call_count == 1
+        
+        # Different search parameters are cached separately
+        service.search_similar([0.1, 0.2, 0.3], limit=3)
+        assert mock_client_instance.query_points.call_count == 2
+        
+        # Writes invalidate cached results
+        service.delete_chunk_by_id(str(uuid4()))
+        service.search_similar([0.1, 0.2, 0.3], limit=5)
+        assert mock_client_instance.query_points.call_count == 3
+
+
+def test_search_similar_cached_results_expire():
+    """Test that cached results expire after the TTL, so writes from elsewhere show up"""
+    with patch('src.services.storage_service.QdrantClient') as mock_client, \
+         patch('src.services.storage_service.AsyncQdrantClient'), \
+         patch('src.services.storage_service.settings.qdrant_search_cache_ttl', 30.0), \
+         patch('src.services.storage_service.time.monotonic') as mock_monotonic:
+        mock_client_instance = MagicMock()
+        mock_client_instance.query_points.return_value.points = []
+        mock_client.return_value = mock_client_instance
+        
+        service = QdrantService()
+        
+        mock_monotonic.return_value = 100.0
+        service.search_similar([0.1, 0.2, 0.3], limit=5)
+        mock_monotonic.return_value = 129.0
+        service.search_similar([0.1, 0.2, 0.3], limit=5)
+        assert mock_client_instance.query_points.call_count == 1
+        
+        mock_monotonic.return_value = 131.0
+        service.search_similar([0.1, 0.2, 0.3], limit=5)
+        assert mock_client_instance.query_points.call_count == 2
+
+
 def test_get_chunk_by_id():
     """Test retrieving a chunk by ID"""
     with patch('qdrant_client.QdrantClient') as mock_client:
@@ -252,4 +430,92 @@ def test_delete_chunk_by_id():
         # Verify the result
         assert result is True
         # Verify that delete was called
-        assert mock_client_instance.delete.called
\ No newline at end of file
+        assert mock_client_instance.delete.called
+
+
+def test_collection_is_initialized_once_per_process():
+    """Test that only the first service instance checks the collection"""
+    with patch('src.services.storage_service.QdrantClient') as mock_client, \
+         patch('src.services.storage_service.AsyncQdrantClient'), \
+         patch.object(QdrantService, '_ready_collections', set()):
+        mock_client_instance = MagicMock()
+        mock_client.return_value = mock_client_instance
+        
+        mock_client_instance.collection_exists.return_value = False
+        
+        QdrantService()
+        QdrantService()
+        
+        mock_client_instance.collection_exists.assert_called_once()
+        mock_client_instance.create_collection.assert_called_once()
+        mock_client_instance.recreate_collection.assert_not_called()
+
+
+def _indexing_thresholds(client):
+    return [
+        call[1]['optimizers_config'].indexing_threshold
+        for call in client.update_collection.call_args_list
+    ]
+
+
+def test_bulk_ingest_restores_configured_threshold():
+    """Test that indexing is resumed with the configured threshold, whatever Qdrant reported"""
+    with patch('src.services.storage_service.QdrantClient') as mock_client, \
+         patch('src.services.storage_service.AsyncQdrantClient'), \
+         patch('src.services.storage_service.settings.qdrant_indexing_threshold', 20000):
+        mock_client_instance = MagicMock()
+        mock_client.return_value = mock_client_instance
+        # An unset threshold used to be "restored" as a no-op diff
+        mock_client_instance.get_collection.return_value.config.optimizer_config.indexing_threshold = None
+
+        service = QdrantService()
+        with service.bulk_ingest():
+            assert _indexing_thresholds(mock_client_instance) == [0]
+
+        assert _indexing_thresholds(mock_client_instance) == [0, 20000]
+
+
+async def test_overlapping_bulk_ingests_resume_indexing_once():
+    """Test that overlapping bulk loads keep indexing paused until the last one exits"""
+    with patch('src.services.storage_service.QdrantClient') as mock_client, \
+         patch('src.services.storage_service.AsyncQdrantClient') as mock_async_client, \
+         patch('src.services.storage_service.settings.qdrant_indexing_threshold', 20000):
+        mock_client_instance = MagicMock()
+        mock_client.return_value = mock_client_instance
+        mock_async_instance = MagicMock()
+        mock_async_instance.update_collection = AsyncMock()
+        mock_async_client.return_value = mock_async_instance
+
+        first, second = QdrantService(), QdrantService()
+        async with first.async_bulk_ingest():
+            with second.bulk_ingest():
+                pass
+            # The second load finished first but must not resume indexing
+            mock_client_instance.update_collection.assert_not_called()
+
+        assert _indexing_thresholds(mock_async_instance) == [0, 20000]
+        assert QdrantService._bulk_ingests == {}
+
+
+async def test_failed_pause_releases_bulk_ingest():
+    """Test that a bulk load whose pause call fails does not stay counted"""
+    with patch('src.services.storage_service.QdrantClient') as mock_client, \
+         patch('src.services.storage_service.AsyncQdrantClient') as mock_async_client, \
+         patch('src.services.storage_service.settings.qdrant_indexing_threshold', 20000):
+        mock_client_instance = MagicMock()
+        mock_client.return_value = mock_client_instance
+        mock_async_instance = MagicMock()
+        mock_async_instance.update_collection = AsyncMock(side_effect=[TimeoutError(), None, None, None])
+        mock_async_client.return_value = mock_async_instance
+
+        service = QdrantService()
+        with pytest.raises(TimeoutError):
+            async with service.async_bulk_ingest():
+                pass
+        assert QdrantService._bulk_ingests == {}
+
+        # The next bulk load pauses indexing and resumes it again
+        mock_async_instance.update_collection.reset_mock()
+        async with service.async_bulk_ingest():
+            pass
+        assert _indexing_thresholds(mock_async_instance) == [0, 20000]
@@ -3,7 +3,11 @@ from fastapi.testclient import TestClient
 from src.main import app
 from unittest.mock import patch, MagicMock
 from src.services.retrieval_service import RetrievalService
-from src.utils.validation import validate_query_result_relevance, deterministic_validation
+from src.utils.validation import (
+    validate_query_result_relevance, deterministic_validation, format_query_results_for_output,
+    validate_result_determinism, validate_embedding_compatibility
+)
+from src.services.validation_helper import validation_helper
 
 
 client = TestClient(app)
@@ -193,6 +197,54 @@ def test_query_result_relevance_validation():
     assert result["details"]["total_results"] == 2
 
 
+def test_determinism_and_embedding_compatibility_utilities():
+    """Test the vectorized determinism and embedding dimension checks"""
+    results = [{"id": "a", "score": 0.81}, {"id": "b", "score": 0.64}]
+    
+    assert validate_result_determinism("q", results, [{"id": "a", "score": 0.815}, {"id": "b", "score": 0.64}])
+    assert not validate_result_determinism("q", results, [{"id": "a", "score": 0.83}, {"id": "b", "score": 0.64}])
+    assert not validate_result_determinism("q", results, results[::-1])
+    
+    assert validate_embedding_compatibility([0.1, 0.2], [[0.3, 0.4], [0.5, 0.6]])
+    assert not validate_embedding_compatibility([0.1, 0.2], [[0.3, 0.4], [0.5]])
+    assert not validate_embedding_compatibility([0.1, 0.2], [])
+
+
+def test_format_query_results_truncates_only_long_content():
+    """Test that result content is cut to 500 characters only when longer"""
+    results = [
+        {"id": "a", "content": "x" * 500, "score": 0.912345},
+        {"id": "b", "content": "y" * 501, "source_url": "https://example.com/ros2"}
+    ]
+    
+    output = format_query_results_for_output(results, "What is ROS 2?")
+    
+    assert output["total_results"] == 2
+    assert output["retrieved_chunks"][0]["content"] == "x" * 500
+    assert output["retrieved_chunks"][0]["score"] == 0.9123
+    assert output["retrieved_chunks"][1]["content"] == "y" * 500 + "..."
+    assert output["retrieved_chunks"][1]["source_url"] == "https://example.com/ros2"
+
+
+def test_query_result_relevance_with_many_keywords():
+    """Test keyword scoring when there are enough keywords to scan them together"""
+    keywords = [f"term{i}" for i in range(18)] + ["robot", "robotics"]
+    results = [{"content": "Humanoid ROBOTICS: each robot runs term3 and term9", "score": 0.5}]
+    
+    result = validate_query_result_relevance("ros", results, keywords)
+    
+    # 4 of 20 keywords match, including overlapping "robot" and "robotics"
+    assert result["confidence"] == pytest.approx(0.5 * 0.7 + 0.2 * 0.3)
+
+
+def test_is_valid_content_rejects_control_characters():
+    """Test that only tab, newline and carriage return are allowed below 0x20"""
+    assert validation_helper._is_valid_content("What is ROS 2?\n\tExplain.\r\n")
+    assert validation_helper._is_valid_content("Über ROS 2 — naïve 机器人")
+    assert not validation_helper._is_valid_content("bad\x00input")
+    assert not validation_helper._is_valid_content("bad\x1binput")
+
+
 def test_pipeline_test_endpoint():
     """Test the pipeline validation endpoint"""
     
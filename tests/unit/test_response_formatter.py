@@ -0,0 +1,49 @@
+"""
+Unit tests for the response formatter service.
+"""
+import pytest
+
+from src.services.response_formatter import ResponseFormatterService
+
+
+def _response(**overrides):
+    response = {
+        "answer": "Humanoid robots use PID controllers for motor control.",
+        "sources": [{"source_url": "https://example.com/ch5"}],
+        "confidence": 0.8
+    }
+    response.update(overrides)
+    return response
+
+
+@pytest.mark.parametrize("response", [
+    pytest.param(_response(), id="float_confidence"),
+    pytest.param(_response(confidence=1), id="int_confidence"),
+    pytest.param(_response(sources=[]), id="no_sources"),
+    pytest.param(
+        _response(usage_stats={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}),
+        id="usage_stats"
+    )
+])
+def test_validate_agent_response_accepts(response):
+    """Test that well-formed agent responses are accepted."""
+    assert ResponseFormatterService().validate_agent_response(response) is True
+
+
+@pytest.mark.parametrize("response", [
+    pytest.param({"sources": [], "confidence": 0.5}, id="missing_answer"),
+    pytest.param(_response(answer=""), id="empty_answer"),
+    pytest.param(_response(sources=({"source_url": "https://example.com/ch5"},)), id="tuple_sources"),
+    pytest.param(_response(confidence=1.5), id="confidence_out_of_range"),
+    pytest.param(_response(confidence="0.8"), id="string_confidence"),
+    pytest.param(_response(confidence=True), id="bool_confidence"),
+    pytest.param(_response(confidence=float("nan")), id="nan_confidence"),
+    pytest.param(_response(usage_stats={"prompt_tokens": 10}), id="partial_usage_stats"),
+    pytest.param(
+        _response(usage_stats={"prompt_tokens": True, "completion_tokens": 5, "total_tokens": 15}),
+        id="bool_token_count"
+    )
+])
+def test_validate_agent_response_rejects(response):
+    """Test that malformed agent responses are rejected."""
+    assert ResponseFormatterService().validate_agent_response(response) is False
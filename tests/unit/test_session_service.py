@@ -191,10 +191,23 @@ async def test_deactivate_session():
     assert retrieved_session.is_active is False
 
 
-def test_cleanup_expired_sessions():
+@pytest.mark.asyncio
+async def test_cleanup_expired_sessions():
     """Test cleaning up expired sessions."""
-    # This test would be more complex as it requires manipulating time
-    # For now, we'll just call the method to ensure it doesn't error
     session_service = SessionService()
-    # The actual cleanup functionality is tested in the session timeout test
-    pass
\ No newline at end of file
+    session_service.session_timeout = timedelta(milliseconds=1)
+    
+    expired = await session_service.create_session()
+    active = await session_service.create_session()
+    
+    import asyncio
+    await asyncio.sleep(0.1)
+    
+    # Simulate recent activity on one of the sessions
+    session_service.sessions[active.id].last_interaction = datetime.now() + timedelta(minutes=1)
+    
+    await session_service.cleanup_expired_sessions()
+    
+    assert expired.id not in session_service.sessions
+    assert expired.id not in session_service.conversations
+    assert active.id in session_service.sessions
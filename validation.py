@@ -24,6 +24,7 @@ async def validate_implementation():
     print("\n2. Testing crawler service...")
     crawler = CrawlerService()
     print(f"✓ Crawler service initialized with max_retries: {settings.max_retries}")
+    await crawler.aclose()
     
     # Test 3: Check chunking service
     print("\n3. Testing chunking service...")
@@ -55,6 +56,7 @@ async def validate_implementation():
     print("\n6. Testing pipeline service...")
     pipeline = PipelineService()
     print("✓ Pipeline service initialized")
+    await pipeline.aclose()
     
     # Test 7: Check that all required environment variables are present
     print("\n7. Verifying environment variables...")